@@ -2,10 +2,21 @@
 https://adventofcode.com/2023/day/1
 """
 
-import pytest
+import os
+import sys
+
+# make the shared aoc package importable when run as a script from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc import instrument
+from aoc.reader import iter_blocks, iter_lines
 
 CALIBRATION_FILENAME = 'input2.txt'
 
+PYTHON_BACKEND = 'python'
+NUMPY_BACKEND = 'numpy'
+NUMPY_BLOCK_SIZE = 1 << 16
+
 NUMBER_MAPPING = {
     'one': 1,
     'two': 2,
@@ -46,26 +57,59 @@ def get_calibration_value(line):
     return int('{}{}'.format(numbers_in_order[0], numbers_in_order[-1]))
 
 
-@pytest.mark.parametrize(('input', 'expected'), [
-    ['1abc2', 12], 
-    ['pqr3stu8vwx', 38],
-    ['a1b2c3d4e5f', 15],
-    ['treb7uchet', 77]
-])
-def test_get_calibration_value_part_1(input, expected):
-    assert get_calibration_value(input) == expected
-
-@pytest.mark.parametrize(('input', 'expected'), [
-    ['two1nine', 29], 
-    ['eightwothree', 83],
-    ['abcone2threexyz', 13],
-    ['xtwone3four', 24],
-    ['4nineeightseven2', 42],
-    ['zoneight234', 14],
-    ['7pqrstsixteen', 76]
-])
-def test_get_calibration_value_part_2(input, expected):
-    assert get_calibration_value(input) == expected
+def get_digit_calibration_value(line):
+    """get the calibration value counting only actual digits (part 1)"""
+    digits = [c for c in line if c.isdigit()]
+    return int(digits[0] + digits[-1])
+
+
+def _sum_block_digit_calibration_values(numpy, block):
+    """
+    The total part 1 calibration value of a block of whole lines (a uint8 array), plus the block-relative indexes of
+    any lines with no digits and the number of lines in the block.
+    """
+    # bytes below '0' wrap round to large values, so one comparison finds the digits
+    digits = block - ord('0')
+    kinds = digits[numpy.flatnonzero((digits < 10) | (block == ord('\n')))]
+
+    # between one newline and the next, kinds holds just the line's digits
+    line_ends = numpy.flatnonzero(kinds == (ord('\n') - ord('0')) % 256)
+    if block[-1] != ord('\n'):
+        line_ends = numpy.append(line_ends, kinds.size)
+    first = numpy.concatenate(([0], line_ends[:-1] + 1))
+    last = line_ends - 1
+    has_digits = first <= last
+
+    total = (kinds[first[has_digits]].astype(numpy.int64) * 10 + kinds[last[has_digits]]).sum()
+    return int(total), numpy.flatnonzero(~has_digits), line_ends.size
+
+
+def sum_digit_calibration_values_numpy(filename, block_size=NUMPY_BLOCK_SIZE):
+    """
+    Part 1 with numpy, with no Python loop per line. The file is mapped as a uint8 array and processed in line-aligned
+    blocks small enough to stay in cache. In each block, the digits and newlines are picked out in one pass, and the
+    first and last digit of every line sit either side of its newlines. Returns the total calibration value, and the
+    (1-based) numbers of any lines with no digits, which add nothing.
+    """
+    import numpy
+
+    blocks = list(iter_blocks(filename, block_size))
+    if not blocks:
+        return 0, []
+
+    data = numpy.memmap(filename, dtype=numpy.uint8, mode='r')
+    total = 0
+    lines_without_digits = []
+    lines_before_block = 0
+    for start, stop in blocks:
+        block_total, block_lines_without_digits, num_lines = _sum_block_digit_calibration_values(
+            numpy, data[start:stop]
+        )
+        total += block_total
+        lines_without_digits.extend((block_lines_without_digits + lines_before_block + 1).tolist())
+        lines_before_block += num_lines
+
+    return total, lines_without_digits
 
 
 def main(calibration_list):
@@ -74,8 +118,25 @@ def main(calibration_list):
 
 
 def get_calibration_list_from_file(filename):
-    with open(filename, 'r') as f:
-        return f.readlines()
+    return iter_lines(filename, decode=True)
+
+
+def part_1(filename, backend=PYTHON_BACKEND):
+    if backend == NUMPY_BACKEND:
+        with instrument.phase('solve'):
+            total, lines_without_digits = sum_digit_calibration_values_numpy(filename)
+        if lines_without_digits:
+            raise ValueError('Lines with no digits: {}'.format(', '.join(map(str, lines_without_digits))))
+        return total
+
+    # lines are parsed as they are streamed from the file, so parsing is part of the solve phase
+    with instrument.phase('solve'):
+        return sum(get_digit_calibration_value(calibration) for calibration in get_calibration_list_from_file(filename))
+
+
+def part_2(filename):
+    with instrument.phase('solve'):
+        return main(get_calibration_list_from_file(filename))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+# make the shared aoc package importable from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc.days import load_day
+
+day_1 = load_day(1)
+get_calibration_value = day_1.get_calibration_value
+sum_digit_calibration_values_numpy = day_1.sum_digit_calibration_values_numpy
+
+
+@pytest.mark.parametrize(('input', 'expected'), [
+    ['1abc2', 12], 
+    ['pqr3stu8vwx', 38],
+    ['a1b2c3d4e5f', 15],
+    ['treb7uchet', 77]
+])
+def test_get_calibration_value_part_1(input, expected):
+    assert get_calibration_value(input) == expected
+
+@pytest.mark.parametrize(('input', 'expected'), [
+    ['two1nine', 29], 
+    ['eightwothree', 83],
+    ['abcone2threexyz', 13],
+    ['xtwone3four', 24],
+    ['4nineeightseven2', 42],
+    ['zoneight234', 14],
+    ['7pqrstsixteen', 76]
+])
+def test_get_calibration_value_part_2(input, expected):
+    assert get_calibration_value(input) == expected
+
+
+@pytest.mark.parametrize(('text', 'block_size', 'expected_total', 'expected_lines_without_digits'), [
+    ['1abc2\npqr3stu8vwx\na1b2c3d4e5f\ntreb7uchet\n', 1 << 16, 142, []],
+    ['1abc2\npqr3stu8vwx\na1b2c3d4e5f\ntreb7uchet\n', 8, 142, []],
+    ['1abc2\r\ntreb7uchet', 1 << 16, 89, []],
+    ['1abc2\nnodigits\n\n9\nxyz', 4, 111, [2, 3, 5]],
+    ['', 1 << 16, 0, []],
+])
+def test_sum_digit_calibration_values_numpy(tmp_path, text, block_size, expected_total, expected_lines_without_digits):
+    pytest.importorskip('numpy')
+    path = tmp_path / 'input.txt'
+    path.write_bytes(text.encode())
+
+    assert sum_digit_calibration_values_numpy(path, block_size) == (expected_total, expected_lines_without_digits)
+
+
+def test_part_1_numpy_reports_lines_without_digits(tmp_path):
+    pytest.importorskip('numpy')
+    path = tmp_path / 'input.txt'
+    path.write_text('1abc2\nnodigits\n')
+
+    with pytest.raises(ValueError, match='Lines with no digits: 2'):
+        day_1.part_1(path, day_1.NUMPY_BACKEND)
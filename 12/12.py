@@ -3,15 +3,28 @@ Advent of Code 2023
 Day 12
 """
 import itertools
+import os
+import sys
+from collections import defaultdict
+
+# make the shared aoc package importable when run as a script from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc import instrument
+from aoc.reader import iter_lines
 
 TEST_INPUT = 'test.txt'
 REAL_INPUT = 'real.txt'
 
 OPERATIONAL_SPRING = '.'
 DAMAGED_SPRING = '#'
+UNKNOWN_SPRING = '?'
 
 EXPANSION_MULTIPLE = 5
 
+BRUTE_FORCE_BACKEND = 'brute-force'
+TRANSFER_BACKEND = 'transfer'
+
 
 def expand_puzzle(puzzle):
     return '?'.join([puzzle]*EXPANSION_MULTIPLE)
@@ -32,6 +45,8 @@ def get_num_arrangements_with_expansion(puzzle, success_conditions):
         if solution_meets_conditions(puzzle_solution, success_conditions):
             found_solutions.append(puzzle_solution)
         
+    instrument.count('springs.records')
+    instrument.count('springs.fills_tried', 2 ** num_unknown)
     print("Found {} solutions.".format(len(found_solutions)))
     return len(found_solutions)
 
@@ -49,9 +64,96 @@ def get_num_arrangements(puzzle, success_conditions):
         if solution_meets_conditions(puzzle_solution, success_conditions):
             found_solutions.append(puzzle_solution)
         
+    instrument.count('springs.records')
+    instrument.count('springs.fills_tried', 2 ** num_unknown)
     print("Found {} solutions.".format(len(found_solutions)))
     return len(found_solutions)
 
+class RecordTransfer:
+    """
+    Counts the arrangements of a record expanded to any multiple, without building the expanded record.
+
+    The expanded record is one copy of the record and a '?' separator, repeated, then a last copy. A partial
+    arrangement is summed up by a state (groups completed, length of the damaged run in progress), and the number of
+    arrangements reaching each state is a state vector. Since the conditions repeat, what one copy does to a state only
+    depends on the groups completed modulo the number of conditions: that transfer (from each state to the groups
+    it completes and the run it leaves) is worked out once per entry state and reused for every copy. Expanding to
+    multiple k applies it k-1 times, so a sweep of every multiple up to k shares the same vectors and costs about as
+    much as solving k alone. Counts are exact Python ints.
+    """
+
+    def __init__(self, puzzle, success_conditions):
+        self.puzzle = puzzle
+        self.success_conditions = success_conditions
+        self._separated_transfers = {}
+        self._last_transfers = {}
+
+    def _step(self, states, spring):
+        """Advance a state vector over one spring, with the conditions repeating forever."""
+        conditions = self.success_conditions
+        next_states = defaultdict(int)
+        for (groups, run), count in states.items():
+            group_size = conditions[groups % len(conditions)]
+            if spring != DAMAGED_SPRING:
+                if run == 0:
+                    next_states[groups, 0] += count
+                elif run == group_size:
+                    next_states[groups + 1, 0] += count
+            if spring != OPERATIONAL_SPRING and run < group_size:
+                next_states[groups, run + 1] += count
+        return next_states
+
+    def _transfer(self, transfers, springs, groups_mod, run):
+        """The (groups completed, run left, count) reached by passing the springs from a state."""
+        if (groups_mod, run) not in transfers:
+            states = {(groups_mod, run): 1}
+            for spring in springs:
+                states = self._step(states, spring)
+            transfers[groups_mod, run] = [
+                (groups - groups_mod, end_run, count) for (groups, end_run), count in states.items()
+            ]
+        return transfers[groups_mod, run]
+
+    def _apply(self, transfers, springs, states, max_groups):
+        next_states = defaultdict(int)
+        num_conditions = len(self.success_conditions)
+        for (groups, run), count in states.items():
+            for groups_completed, end_run, ways in self._transfer(transfers, springs, groups % num_conditions, run):
+                end_groups = groups + groups_completed
+                # no state past the last group can end up matching, whatever follows
+                if end_groups < max_groups or (end_groups == max_groups and end_run == 0):
+                    next_states[end_groups, end_run] += count * ways
+        return next_states
+
+    def _count_matching(self, states, num_groups):
+        last_group_size = self.success_conditions[-1]
+        return sum(
+            count for (groups, run), count in states.items()
+            if (groups == num_groups and run == 0) or (groups == num_groups - 1 and run == last_group_size)
+        )
+
+    def sweep_arrangements(self, max_multiple=EXPANSION_MULTIPLE):
+        """The number of arrangements of the record expanded to each multiple from 1 to max_multiple, in order."""
+        num_conditions = len(self.success_conditions)
+        max_groups = max_multiple * num_conditions
+        separated_springs = self.puzzle + UNKNOWN_SPRING
+
+        arrangements = []
+        states = {(0, 0): 1}
+        for multiple in range(1, max_multiple + 1):
+            last_states = self._apply(self._last_transfers, self.puzzle, states, max_groups)
+            arrangements.append(self._count_matching(last_states, multiple * num_conditions))
+            if multiple < max_multiple:
+                states = self._apply(self._separated_transfers, separated_springs, states, max_groups)
+
+        instrument.count('springs.records')
+        instrument.count('springs.transfers', len(self._separated_transfers) + len(self._last_transfers))
+        return arrangements
+
+    def count_arrangements(self, multiple=EXPANSION_MULTIPLE):
+        return self.sweep_arrangements(multiple)[-1]
+
+
 def solution_meets_conditions(solution, conditions):
     """
     Does the solution match the defined success conditions?
@@ -67,8 +169,29 @@ def import_from_lines(lines):
         yield puzzle, success_conditions
 
 def import_from_file(filename):
-    with open(filename, 'r') as f:
-        return import_from_lines(f.readlines())
+    return import_from_lines(iter_lines(filename, decode=True))
+
+def part_1(filename):
+    with instrument.phase('parse'):
+        puzzles = list(import_from_file(filename))
+    with instrument.phase('solve'):
+        arrangements = [get_num_arrangements(puzzle, success_conditions) for puzzle, success_conditions in puzzles]
+    with instrument.phase('aggregate'):
+        return sum(arrangements)
+
+def part_2(filename, backend=TRANSFER_BACKEND):
+    with instrument.phase('parse'):
+        puzzles = list(import_from_file(filename))
+    with instrument.phase('solve'):
+        if backend == TRANSFER_BACKEND:
+            arrangements = [RecordTransfer(*puzzle).count_arrangements() for puzzle in puzzles]
+        else:
+            arrangements = [
+                get_num_arrangements_with_expansion(puzzle, success_conditions)
+                for puzzle, success_conditions in puzzles
+            ]
+    with instrument.phase('aggregate'):
+        return sum(arrangements)
 
 def main():
     puzzles = import_from_file(TEST_INPUT)
@@ -76,3 +199,20 @@ def main():
 
 if __name__=='__main__':
     print(main())
+
+
+def test_record_transfer_matches_brute_force():
+    for puzzle, success_conditions in import_from_lines(['???.### 1,1,3', '.??..??...?##. 1,1,3', '.#?.# 1,1']):
+        expected = [
+            get_num_arrangements('?'.join([puzzle] * multiple), success_conditions * multiple) for multiple in (1, 2)
+        ]
+        assert RecordTransfer(puzzle, success_conditions).sweep_arrangements(2) == expected
+
+
+def test_record_transfer_expanded():
+    records = ['???.### 1,1,3', '.??..??...?##. 1,1,3', '?#?#?#?#?#?#?#? 1,3,1,6', '????.#...#... 4,1,1',
+               '????.######..#####. 1,6,5', '?###???????? 3,2,1']
+    transfers = [RecordTransfer(*puzzle) for puzzle in import_from_lines(records)]
+
+    assert [transfer.count_arrangements() for transfer in transfers] == [1, 16384, 1, 16, 2500, 506250]
+    assert transfers[5].sweep_arrangements(3) == [10, 150, 2250]
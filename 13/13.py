@@ -9,13 +9,23 @@ Pseudocode explanation:
 Be careful of shadowing in-built `map` fn in this file.
 """
 
-import pytest
+import os
+import sys
+
+# make the shared aoc package importable when run as a script from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc import instrument
+from aoc.reader import iter_lines
 
 TEST_INPUT = 'test.txt'
 REAL_INPUT = 'map.txt'
 
 SMUDGE_TOLERANCE = 1
 
+PYTHON_BACKEND = 'python'
+NUMPY_BACKEND = 'numpy'
+
 
 def import_maps(input_text):
     maps = []
@@ -38,7 +48,7 @@ def get_reflection_errors(line1, line2):
     num_errors = sum(c1 != c2 for c1, c2 in zip(line1, line2))
     return num_errors
 
-def is_map_symmetrical_at_row(map_, row_num):
+def is_map_symmetrical_at_row(map_, row_num, smudge_tolerance=SMUDGE_TOLERANCE):
     """
     For a map to be symmetrical at the row, concentric groups of lines outward must be equal, until we reach
     vertical bounds of map.
@@ -49,33 +59,116 @@ def is_map_symmetrical_at_row(map_, row_num):
     """
     line_comparisons = zip(range(row_num, -1, -1), range(row_num+1, len(map_)))
     reflection_errors = [get_reflection_errors(map_[line_a], map_[line_b]) for line_a, line_b in line_comparisons]
-    return sum(reflection_errors) == SMUDGE_TOLERANCE
+    instrument.count('reflection.candidates')
+    instrument.count('reflection.line_comparisons', len(reflection_errors))
+    return sum(reflection_errors) == smudge_tolerance
     
 def transpose_map(map_):
     """rotate entire map counter-clockwise. This makes the first row now the first column."""
     return list(zip(*map_))
 
-def find_horizontal_symmetry(map_):
+def find_horizontal_symmetry(map_, smudge_tolerance=SMUDGE_TOLERANCE):
     """Check each reflection point for symmetry"""
     for reflection_point in range(len(map_)-1):
-        if is_map_symmetrical_at_row(map_, reflection_point):
+        if is_map_symmetrical_at_row(map_, reflection_point, smudge_tolerance):
             return reflection_point + 1  # (1-indexed)
 
     # no symmetry found
     return None
 
-def find_symmetry(map):
+def find_symmetry(map, smudge_tolerance=SMUDGE_TOLERANCE):
     vertical_symmetry_point = None
-    horizontal_symmetry_point = find_horizontal_symmetry(map)
+    horizontal_symmetry_point = find_horizontal_symmetry(map, smudge_tolerance)
 
     if horizontal_symmetry_point is None:
-        vertical_symmetry_point = find_horizontal_symmetry(transpose_map(map))
+        vertical_symmetry_point = find_horizontal_symmetry(transpose_map(map), smudge_tolerance)
 
     return ((horizontal_symmetry_point or 0) * 100) + (vertical_symmetry_point or 0)
 
+class NumpyReflectionEngine:
+    """
+    Scores every reflection point of a map on both axes at once, on a 2D uint8 array. The reflection between lines r and
+    r+1 pairs up lines i and j wherever i + j == 2r + 1, so its number of errors is the sum of those lines' mismatch
+    counts: one pairwise mismatch matrix per axis, summed along its anti-diagonals, scores all of the axis's candidates
+    together. Columns are compared through a view along axis 1, without transposing the map.
+    """
+
+    def __init__(self):
+        import numpy
+
+        self.numpy = numpy
+        self._pair_indexes = {}
+
+    def _mirror_pairs(self, num_lines):
+        """Every pair of lines i < j that mirror each other about some reflection point, and that point."""
+        if num_lines not in self._pair_indexes:
+            line_a, line_b = self.numpy.triu_indices(num_lines, 1)
+            mirrored = (line_a + line_b) % 2 == 1
+            line_a, line_b = line_a[mirrored], line_b[mirrored]
+            self._pair_indexes[num_lines] = line_a, line_b, (line_a + line_b) // 2
+        return self._pair_indexes[num_lines]
+
+    def score_reflections(self, board, axis):
+        """The number of reflection errors for each reflection point between lines along the axis."""
+        numpy = self.numpy
+        lines = numpy.moveaxis(board, axis, 0)
+        num_lines = lines.shape[0]
+        if num_lines < 2:
+            return numpy.zeros(0, dtype=numpy.int64)
+
+        # lines i and j match wherever they hold the same symbol, so one-hot matrix products count their matches
+        # without building a num_lines x num_lines x line_length array of comparisons
+        lines = lines.reshape(num_lines, -1)
+        matches = sum(
+            one_hot @ one_hot.T
+            for one_hot in ((lines == symbol).astype(numpy.float32) for symbol in numpy.unique(lines))
+        )
+        mismatches = lines.shape[1] - matches.astype(numpy.int64)
+        line_a, line_b, reflection_points = self._mirror_pairs(num_lines)
+        if instrument.enabled:
+            instrument.count('reflection.candidates', num_lines - 1)
+            instrument.count('reflection.line_comparisons', line_a.size)
+        return numpy.bincount(
+            reflection_points, weights=mismatches[line_a, line_b], minlength=num_lines - 1
+        ).astype(numpy.int64)
+
+    def find_symmetry(self, map_, smudge_tolerance=SMUDGE_TOLERANCE):
+        """As find_symmetry: the first horizontal reflection with exactly smudge_tolerance errors, else vertical."""
+        numpy = self.numpy
+        board = numpy.frombuffer(''.join(''.join(line) for line in map_).encode(), dtype=numpy.uint8)
+        board = board.reshape(len(map_), -1)
+
+        for axis, multiplier in ((0, 100), (1, 1)):
+            matches = numpy.flatnonzero(self.score_reflections(board, axis) == smudge_tolerance)
+            if matches.size:
+                return (int(matches[0]) + 1) * multiplier
+
+        return 0
+
+
 def import_maps_from_file(input_file):
-    with open(input_file, 'r') as f:
-        return import_maps(f.readlines())
+    return import_maps(iter_lines(input_file, decode=True))
+
+
+def _solve(filename, smudge_tolerance, backend=PYTHON_BACKEND):
+    with instrument.phase('parse'):
+        maps = import_maps_from_file(filename)
+    with instrument.phase('solve'):
+        if backend == NUMPY_BACKEND:
+            engine = NumpyReflectionEngine()
+            symmetries = [engine.find_symmetry(map, smudge_tolerance) for map in maps]
+        else:
+            symmetries = [find_symmetry(map, smudge_tolerance) for map in maps]
+    with instrument.phase('aggregate'):
+        return sum(symmetries)
+
+
+def part_1(filename, backend=PYTHON_BACKEND):
+    return _solve(filename, smudge_tolerance=0, backend=backend)
+
+
+def part_2(filename, backend=PYTHON_BACKEND):
+    return _solve(filename, smudge_tolerance=SMUDGE_TOLERANCE, backend=backend)
 
 
 def main():
@@ -85,3 +178,18 @@ def main():
 
 if __name__=='__main__':
     print(main())
+
+
+def test_numpy_engine_matches_find_symmetry():
+    import pytest
+    pytest.importorskip('numpy')
+
+    maps = import_maps_from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), TEST_INPUT))
+    engine = NumpyReflectionEngine()
+    for smudge_tolerance in (0, SMUDGE_TOLERANCE):
+        assert [engine.find_symmetry(map_, smudge_tolerance) for map_ in maps] == [
+            find_symmetry(map_, smudge_tolerance) for map_ in maps
+        ]
+
+    assert engine.find_symmetry([list('#.'), list('#.')], 0) == 100
+    assert engine.find_symmetry([list('##.')], 0) == 1
@@ -7,7 +7,14 @@ Part 1: two problems:
 """
 
 import itertools
-from collections import defaultdict
+import os
+import sys
+
+# make the shared aoc package importable when run as a script from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc import instrument
+from aoc.grid import CharGrid
 
 TEST_LAYOUT = 'test.txt'
 REAL_LAYOUT = 'layout.txt'
@@ -18,17 +25,48 @@ SPACE_SYMBOL = '.'
 
 NUM_CYCLES = 1000000000
 
+BYTES_BACKEND = 'bytes'
+NUMPY_BACKEND = 'numpy'
+
+
+def roll_rocks(line, towards_start=True):
+    """
+    Roll the rocks in a line of layout bytes as far as they go towards its start (or end), stopping at cube rocks.
+    e.g. b'.O.#..O' becomes b'O..#O..'
+    """
+    rolled_segments = []
+    for segment in line.split(CUBE_SYMBOL.encode()):
+        rocks = ROCK_SYMBOL.encode() * segment.count(ROCK_SYMBOL.encode())
+        if towards_start:
+            rolled_segments.append(rocks.ljust(len(segment), SPACE_SYMBOL.encode()))
+        else:
+            rolled_segments.append(rocks.rjust(len(segment), SPACE_SYMBOL.encode()))
+
+    return CUBE_SYMBOL.encode().join(rolled_segments)
+
+
+def count_rocks_moved(line, towards_start=True):
+    """
+    The number of rocks that roll_rocks moves: in each segment, every rock except those already packed against the
+    end they roll towards. e.g. b'.O.O' has 2 rocks moved towards its start, and b'OO.O' just 1.
+    """
+    rocks_moved = 0
+    for segment in line.split(CUBE_SYMBOL.encode()):
+        packed = segment.lstrip(ROCK_SYMBOL.encode()) if towards_start else segment.rstrip(ROCK_SYMBOL.encode())
+        rocks_moved += packed.count(ROCK_SYMBOL.encode())
+    return rocks_moved
+
+
+class LayoutItem:
+    """
+    A cell of the layout. Spaces and cubes never move, so they hold no state and are shared: see ImmutableLayoutItem.
+    """
+    __slots__ = ()
 
-class SpaceLayoutItem:
     is_blocking = False
     contributes_to_load = False
     symbol = SPACE_SYMBOL
 
-    def __init__(self, layout, x, y):
-        self.layout = layout
-        self.x = x
-        self.y = y
-
     def __repr__(self):
         return self.symbol
 
@@ -47,11 +85,43 @@ class SpaceLayoutItem:
     def can_move_right(self):
         return False
 
-class RockLayoutItem(SpaceLayoutItem):
+class ImmutableLayoutItem(LayoutItem):
+    """A flyweight: each subclass has a single instance, returned whatever layout and position it is created with."""
+    __slots__ = ()
+
+    _instances = {}
+
+    def __new__(cls, layout=None, x=None, y=None):
+        instance = cls._instances.get(cls)
+        if instance is None:
+            instance = cls._instances[cls] = super().__new__(cls)
+        return instance
+
+class SpaceLayoutItem(ImmutableLayoutItem):
+    __slots__ = ()
+
+class CubeLayoutItem(ImmutableLayoutItem):
+    __slots__ = ()
+
+    is_blocking = True
+    contributes_to_load = False
+    symbol = CUBE_SYMBOL
+
+SPACE_ITEM = SpaceLayoutItem()
+CUBE_ITEM = CubeLayoutItem()
+
+class RockLayoutItem(LayoutItem):
+    __slots__ = ('layout', 'x', 'y')
+
     is_blocking = True
     contributes_to_load = True
     symbol = ROCK_SYMBOL
 
+    def __init__(self, layout, x, y):
+        self.layout = layout
+        self.x = x
+        self.y = y
+
     def can_move_up(self):
         block_above = self.layout.get_item_at_position(self.x, self.y-1)
         return block_above.is_blocking is False
@@ -81,74 +151,173 @@ class RockLayoutItem(SpaceLayoutItem):
     def move_right(self):
         self.layout.place_item_in_position(self, self.x+1, self.y)
 
-class CubeLayoutItem(SpaceLayoutItem):
-    is_blocking = True
-    contributes_to_load = False
-    symbol = CUBE_SYMBOL
 
-class RockLayout:
-    def __init__(self, text_layout):
-        self.grid = {}
+class NumpyTiltEngine:
+    """
+    Vectorised tilts over a uint8 array view of a layout's CharGrid.
+
+    Cube rocks never move, so for each direction the non-cube cells are precomputed once, in tilt order, along with
+    the cube-delimited segment each belongs to and its rank from the segment's leading end. A tilt is then a count of
+    rocks per segment, and one scatter that refills each segment's first count cells with rocks and the rest with
+    spaces.
+    """
+
+    def __init__(self, grid):
+        import numpy
+
+        self.numpy = numpy
+        # a grid mapped from a file keeps its line endings, so rows are stride bytes apart and board skips them
+        self.flat_board = numpy.frombuffer(grid.data, dtype=numpy.uint8)
+        self.board = numpy.ndarray(
+            (grid.height, grid.width), dtype=numpy.uint8, buffer=grid.data, strides=(grid.stride, 1)
+        )
+        self.row_loads = numpy.arange(grid.height, 0, -1)
+
+        indexes = numpy.arange(grid.height)[:, None] * grid.stride + numpy.arange(grid.width)
+        self.segments = {
+            'north': self._build_segments(indexes.T),
+            'south': self._build_segments(indexes.T[:, ::-1]),
+            'west': self._build_segments(indexes),
+            'east': self._build_segments(indexes[:, ::-1]),
+        }
+
+    def _build_segments(self, lines):
+        """
+        lines holds the flat board indexes of each line, in the order rocks roll along it. Returns the non-cube
+        indexes in that order, with their segment ids and ranks, and the number of segments.
+        """
+        numpy = self.numpy
+        order = lines.reshape(-1)
+        is_cube = self.flat_board[order] == ord(CUBE_SYMBOL)
 
-        for y, line in enumerate(text_layout):
-            for x, character in enumerate(c for c in line if c.isprintable()):
-                layout_item = self.get_layout_class(character)(self, x, y)
-                self.grid[(x, y)] = layout_item
+        # a segment starts at the start of each line, and just after each cube
+        starts = numpy.zeros(order.size, dtype=bool)
+        starts[::lines.shape[1]] = True
+        starts[1:] |= is_cube[:-1]
+
+        positions = numpy.arange(order.size)
+        segment_ids = numpy.cumsum(starts) - 1
+        ranks = positions - numpy.maximum.accumulate(numpy.where(starts, positions, 0))
+
+        free = ~is_cube
+        return order[free], segment_ids[free], ranks[free], int(segment_ids[-1]) + 1 if order.size else 0
+
+    def tilt(self, direction):
+        numpy = self.numpy
+        order, segment_ids, ranks, num_segments = self.segments[direction]
+
+        is_rock = self.flat_board[order] == ord(ROCK_SYMBOL)
+        rocks_per_segment = numpy.bincount(segment_ids[is_rock], minlength=num_segments)
+        now_rock = ranks < rocks_per_segment[segment_ids]
+        self.flat_board[order] = numpy.where(now_rock, ord(ROCK_SYMBOL), ord(SPACE_SYMBOL))
+
+        if instrument.enabled:
+            num_lines = self.board.shape[1] if direction in ('north', 'south') else self.board.shape[0]
+            instrument.count('tilt.lines', num_lines)
+            # the rocks that stay put in a segment are those before its first space, so every other rock moved
+            packed = rocks_per_segment.copy()
+            numpy.minimum.at(packed, segment_ids[~is_rock], ranks[~is_rock])
+            instrument.count('tilt.rocks_moved', int(rocks_per_segment.sum() - packed.sum()))
+
+    def north_supports_load(self):
+        return int((self.board == ord(ROCK_SYMBOL)).sum(axis=1) @ self.row_loads)
+
+
+class RockLayout:
+    """
+    The layout is held as a CharGrid of symbols. Layout items are created on demand as views of a position, for
+    callers that want to move individual rocks.
+
+    Tilts roll whole lines of bytes at once by default. backend=NUMPY_BACKEND tilts with a NumpyTiltEngine instead,
+    which works on the same buffer, so every other method sees its results.
+    """
+
+    def __init__(self, text_layout, backend=BYTES_BACKEND):
+        # text_layout is the layout's lines, or a CharGrid (as mapped by CharGrid.from_file)
+        self.grid = text_layout if isinstance(text_layout, CharGrid) else CharGrid.from_lines(text_layout)
+        self.backend = backend
+        if backend == NUMPY_BACKEND:
+            self.tilt_engine = NumpyTiltEngine(self.grid)
+        elif backend == BYTES_BACKEND:
+            self.tilt_engine = None
+        else:
+            raise ValueError('Unknown tilt backend {!r}'.format(backend))
 
     def __repr__(self):
-        return '\n'.join(''.join(map(repr, row)) for row in self.items)
+        return str(self.grid)
 
     def serialize(self):
-        return [''.join(map(repr, row)) for row in self.items]
+        return self.grid.lines()
 
     @property
     def items(self):
-        cells_by_row = defaultdict(list)
-        for ((x, y), item) in sorted(self.grid.items(), key=lambda loc_item: loc_item[0]):
-            cells_by_row[y].append(item)
-
-        return [items for y, items in sorted(cells_by_row.items(), key=lambda y_items: y_items[0])]
-
+        return [[self.get_item_at_position(x, y) for x in range(self.grid.width)] for y in range(self.grid.height)]
 
     def get_item_at_position(self, x, y):
-        """Get the block in a given position, or (if it does not exist) return a blocking object that is in that position."""
-        return self.grid.get((x, y), CubeLayoutItem(self, x, y))
+        """
+        Get the block in a given position, or (if it does not exist) return a blocking object. Only rocks are created
+        per position: spaces and cubes are the shared SPACE_ITEM and CUBE_ITEM.
+        """
+        symbol = self.grid.get(x, y)
+        if symbol is None:
+            return CUBE_ITEM
+        return self.get_layout_class(chr(symbol))(self, x, y)
 
     def place_item_in_position(self, item, x, y):
         """
         place the specified item into the specified new position, and fill the old position with a space.
         this method does not check that the space being moved in to is non-blocking. the caller should do that first.
         """
-        old_position = (item.x, item.y)
-        self.grid[(x, y)] = item
+        instrument.count('rock.moves')
+        self.grid[item.x, item.y] = SPACE_SYMBOL
+        self.grid[x, y] = item.symbol
         item.x = x
         item.y = y
 
-        self.grid[old_position] = SpaceLayoutItem(self, *old_position)
+    def _tilt(self, line_slices, towards_start):
+        data = self.grid.data
+        rocks_moved = 0
+        for line_slice in line_slices:
+            line = data[line_slice]
+            data[line_slice] = roll_rocks(line, towards_start)
+            if instrument.enabled:
+                rocks_moved += count_rocks_moved(line, towards_start)
+
+        if instrument.enabled:
+            instrument.count('tilt.lines', len(line_slices))
+            instrument.count('tilt.rocks_moved', rocks_moved)
+
+    def _column_slices(self):
+        stride, last_row_start = self.grid.stride, (self.grid.height - 1) * self.grid.stride
+        return [slice(x, last_row_start + x + 1, stride) for x in range(self.grid.width)]
+
+    def _row_slices(self):
+        stride, width = self.grid.stride, self.grid.width
+        return [slice(y * stride, y * stride + width) for y in range(self.grid.height)]
 
     def tilt_north(self):
-        for item_row in self.items:
-            for item in item_row:
-                while item.can_move_up():
-                    item.move_up()
+        if self.tilt_engine:
+            self.tilt_engine.tilt('north')
+        else:
+            self._tilt(self._column_slices(), towards_start=True)
 
     def tilt_south(self):
-        for item_row in reversed(self.items):
-            for item in item_row:
-                while item.can_move_down():
-                    item.move_down()
+        if self.tilt_engine:
+            self.tilt_engine.tilt('south')
+        else:
+            self._tilt(self._column_slices(), towards_start=False)
 
     def tilt_east(self):
-        for item_row in self.items:
-            for item in reversed(item_row):
-                while item.can_move_right():
-                    item.move_right()
+        if self.tilt_engine:
+            self.tilt_engine.tilt('east')
+        else:
+            self._tilt(self._row_slices(), towards_start=False)
 
     def tilt_west(self):
-        for item_row in self.items:
-            for item in item_row:
-                while item.can_move_left():
-                    item.move_left()
+        if self.tilt_engine:
+            self.tilt_engine.tilt('west')
+        else:
+            self._tilt(self._row_slices(), towards_start=True)
 
     def spin_cycle(self):
         previous_runs = []
@@ -166,16 +335,19 @@ class RockLayout:
                 cycle_length = len(previous_runs) - previous_runs.index(state)
                 cycle_pos = (NUM_CYCLES - len(previous_runs)) % cycle_length
                 final_position = previous_runs[-cycle_length:][cycle_pos-1]
-                return RockLayout(final_position).calculate_north_supports_load()
+                return RockLayout(final_position, self.backend).calculate_north_supports_load()
 
             previous_runs.append(state)
 
     def calculate_north_supports_load(self):
-        num_rows = len(self.items)
+        if self.tilt_engine:
+            return self.tilt_engine.north_supports_load()
+
+        num_rows = self.grid.height
         total_load = 0
-        for i, row in enumerate(self.items, start=0):
-            total_load += sum(num_rows-i for rock in row if rock.contributes_to_load)
-        
+        for i, row in enumerate(self.grid.rows(), start=0):
+            total_load += (num_rows-i) * bytes(row).count(ROCK_SYMBOL.encode())
+
         return total_load
 
     def get_layout_class(self, character):
@@ -185,9 +357,22 @@ class RockLayout:
             SPACE_SYMBOL: SpaceLayoutItem
         }[character]
 
-def import_layout_from_file(filename):
-    with open(filename, 'r') as f:
-        return RockLayout(f.readlines()) 
+def import_layout_from_file(filename, backend=BYTES_BACKEND):
+    return RockLayout(CharGrid.from_file(filename), backend)
+
+def part_1(filename, backend=BYTES_BACKEND):
+    with instrument.phase('parse'):
+        layout = import_layout_from_file(filename, backend)
+    with instrument.phase('solve'):
+        layout.tilt_north()
+    with instrument.phase('aggregate'):
+        return layout.calculate_north_supports_load()
+
+def part_2(filename, backend=BYTES_BACKEND):
+    with instrument.phase('parse'):
+        layout = import_layout_from_file(filename, backend)
+    with instrument.phase('solve'):
+        return layout.spin_cycle()
 
 def main():
     layout = import_layout_from_file(REAL_LAYOUT)
@@ -197,3 +382,145 @@ def main():
 
 if __name__=='__main__':
     print(main())
+
+
+TEST_LAYOUT_LINES = """
+O....#....
+O.OO#....#
+.....##...
+OO.#O....O
+.O.....O#.
+O.#..O.#.#
+..O..#O..O
+.......O..
+#....###..
+#OO..#....""".strip().splitlines()
+
+
+def test_tilt_north_and_load():
+    layout = RockLayout(TEST_LAYOUT_LINES)
+    layout.tilt_north()
+
+    assert layout.serialize()[:2] == ['OOOO.#.O..', 'OO..#....#']
+    assert layout.calculate_north_supports_load() == 136
+
+
+def test_spin_cycle():
+    assert RockLayout(TEST_LAYOUT_LINES).spin_cycle() == 64
+
+
+def test_layout_items_move_rocks_in_grid():
+    layout = RockLayout(['.#', 'O.'])
+    rock = layout.get_item_at_position(0, 1)
+
+    assert rock.can_move_up()
+    rock.move_up()
+    assert layout.serialize() == ['O#', '..']
+    assert not rock.can_move_right()
+    assert not rock.can_move_up()
+
+
+def test_numpy_backend_matches_bytes_backend():
+    import pytest
+    pytest.importorskip('numpy')
+
+    layout = RockLayout(TEST_LAYOUT_LINES)
+    numpy_layout = RockLayout(TEST_LAYOUT_LINES, NUMPY_BACKEND)
+    for tilt in ('tilt_north', 'tilt_west', 'tilt_south', 'tilt_east') * 3:
+        getattr(layout, tilt)()
+        getattr(numpy_layout, tilt)()
+        assert numpy_layout.serialize() == layout.serialize()
+        assert numpy_layout.calculate_north_supports_load() == layout.calculate_north_supports_load()
+
+    assert RockLayout(TEST_LAYOUT_LINES, NUMPY_BACKEND).spin_cycle() == 64
+
+
+def check_layout_mapped_from_file(tmp_path, backend):
+    layout_file = tmp_path / 'layout.txt'
+    # no final newline, so the mapped grid's last row is one byte short of the stride
+    layout_file.write_text('\n'.join(TEST_LAYOUT_LINES))
+
+    layout = import_layout_from_file(layout_file, backend)
+    assert layout.grid.stride == layout.grid.width + 1
+
+    expected = RockLayout(TEST_LAYOUT_LINES)
+    for tilt in ('tilt_north', 'tilt_west', 'tilt_south', 'tilt_east'):
+        getattr(layout, tilt)()
+        getattr(expected, tilt)()
+        assert layout.serialize() == expected.serialize()
+        assert layout.calculate_north_supports_load() == expected.calculate_north_supports_load()
+
+    assert import_layout_from_file(layout_file, backend).spin_cycle() == 64
+    # the mapping is copy-on-write, so the file itself is never tilted
+    assert layout_file.read_text() == '\n'.join(TEST_LAYOUT_LINES)
+
+
+def test_layout_mapped_from_file(tmp_path):
+    check_layout_mapped_from_file(tmp_path, BYTES_BACKEND)
+
+
+def test_numpy_layout_mapped_from_file(tmp_path):
+    import pytest
+    pytest.importorskip('numpy')
+
+    check_layout_mapped_from_file(tmp_path, NUMPY_BACKEND)
+
+
+def count_rocks_moved_one_by_one(text_layout):
+    """Tilt north by moving each rock up as far as it goes, returning the layout and how many rocks moved."""
+    layout = RockLayout(text_layout)
+    rocks_moved = 0
+    for y, x in itertools.product(range(layout.grid.height), range(layout.grid.width)):
+        item = layout.get_item_at_position(x, y)
+        if item.symbol == ROCK_SYMBOL and item.can_move_up():
+            rocks_moved += 1
+            while item.can_move_up():
+                item.move_up()
+    return layout, rocks_moved
+
+
+def check_tilt_counts_rocks_moved(backend):
+    for text_layout in (['.', 'O', '.', 'O'], ['O', 'O', '.', 'O'], TEST_LAYOUT_LINES):
+        expected_layout, expected_moved = count_rocks_moved_one_by_one(text_layout)
+        layout = RockLayout(text_layout, backend)
+        instrument.enable()
+        try:
+            layout.tilt_north()
+            moved = instrument.counters['tilt.rocks_moved']
+            layout.tilt_north()
+            moved_again = instrument.counters['tilt.rocks_moved'] - moved
+        finally:
+            instrument.disable()
+            instrument.reset()
+
+        assert layout.serialize() == expected_layout.serialize()
+        assert moved == expected_moved
+        assert moved_again == 0
+
+    instrument.enable()
+    try:
+        RockLayout(['.O.O'], backend).tilt_west()
+        assert instrument.counters['tilt.rocks_moved'] == 2
+    finally:
+        instrument.disable()
+        instrument.reset()
+
+
+def test_tilt_counts_rocks_moved():
+    check_tilt_counts_rocks_moved(BYTES_BACKEND)
+
+
+def test_numpy_tilt_counts_rocks_moved():
+    import pytest
+    pytest.importorskip('numpy')
+
+    check_tilt_counts_rocks_moved(NUMPY_BACKEND)
+
+
+def test_spaces_and_cubes_are_shared():
+    layout = RockLayout(['.#', 'O.'])
+
+    assert layout.get_item_at_position(0, 0) is layout.get_item_at_position(1, 1) is SPACE_ITEM
+    assert layout.get_item_at_position(1, 0) is layout.get_item_at_position(-1, 0) is CUBE_ITEM
+    assert SpaceLayoutItem(layout, 0, 0) is SPACE_ITEM
+    assert not hasattr(layout.get_item_at_position(0, 1), '__dict__')
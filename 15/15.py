@@ -2,11 +2,17 @@
 Advent of Code 2023 Day 15
 """
 
+import os
 import re
-import pytest
+import sys
 
 from collections import defaultdict, namedtuple
 
+# make the shared aoc package importable when run as a script from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc import instrument
+
 
 INPUT_FILE = 'input.txt'
 
@@ -49,8 +55,10 @@ class InitializationSequence:
         """
         for i, lens in enumerate(box):
             if lens.label == label:
+                instrument.count('lens.lenses_scanned', i + 1)
                 return lens, i
 
+        instrument.count('lens.lenses_scanned', len(box))
         return None, None
 
     def perform_step(self, command):
@@ -84,43 +92,25 @@ class InitializationSequence:
         
     
 
-@pytest.mark.parametrize(('input', 'expected'), [
-    ('rn=1', ('rn', '=', '1')),
-    ('cm-', ('cm', '-', None)),
-    ('qp=3', ('qp', '=', '3')),
-    ('cm=2', ('cm', '=', '2')),
-    ('qp-', ('qp', '-', None)),
-    ('pc=4', ('pc', '=', '4')),
-    ('ot=9', ('ot', '=', '9')),
-    ('ab=5', ('ab', '=', '5')),
-    ('pc-', ('pc', '-', None)),
-    ('pc=6', ('pc', '=', '6')),
-    ('ot=7', ('ot', '=', '7')),
-])
-def test_parse_command(input, expected):
-    assert InitializationSequence.parse_command(input) == expected
-
-@pytest.mark.parametrize(('input', 'expected'), [
-    ('HASH', 52),
-    ('rn=1', 30),
-    ('cm-', 253),
-    ('qp=3', 97),
-    ('cm=2', 47),
-    ('qp-', 14),
-    ('pc=4', 180),
-    ('ot=9', 9),
-    ('ab=5', 197),
-    ('pc-', 48),
-    ('pc=6', 214),
-    ('ot=7', 231),
-])
-def test_get_hash_value_of_string(input, expected):
-    assert get_hash_value_of_string(input) == expected
-
 def get_input_from_file(filename):
     with open(filename, 'r') as f:
         return f.read().split(',')
 
+def part_1(filename):
+    with instrument.phase('parse'):
+        steps = get_input_from_file(filename)
+    with instrument.phase('solve'):
+        return sum(get_hash_value_of_string(s) for s in steps)
+
+def part_2(filename):
+    with instrument.phase('parse'):
+        steps = get_input_from_file(filename)
+    with instrument.phase('solve'):
+        init = InitializationSequence()
+        init.perform_sequence(steps)
+    with instrument.phase('aggregate'):
+        return init.get_focusing_power()
+
 def main():
     input = get_input_from_file(INPUT_FILE)
     
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+# make the shared aoc package importable from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc.days import load_day
+
+day_15 = load_day(15)
+InitializationSequence = day_15.InitializationSequence
+get_hash_value_of_string = day_15.get_hash_value_of_string
+
+
+@pytest.mark.parametrize(('input', 'expected'), [
+    ('rn=1', ('rn', '=', '1')),
+    ('cm-', ('cm', '-', None)),
+    ('qp=3', ('qp', '=', '3')),
+    ('cm=2', ('cm', '=', '2')),
+    ('qp-', ('qp', '-', None)),
+    ('pc=4', ('pc', '=', '4')),
+    ('ot=9', ('ot', '=', '9')),
+    ('ab=5', ('ab', '=', '5')),
+    ('pc-', ('pc', '-', None)),
+    ('pc=6', ('pc', '=', '6')),
+    ('ot=7', ('ot', '=', '7')),
+])
+def test_parse_command(input, expected):
+    assert InitializationSequence.parse_command(input) == expected
+
+@pytest.mark.parametrize(('input', 'expected'), [
+    ('HASH', 52),
+    ('rn=1', 30),
+    ('cm-', 253),
+    ('qp=3', 97),
+    ('cm=2', 47),
+    ('qp-', 14),
+    ('pc=4', 180),
+    ('ot=9', 9),
+    ('ab=5', 197),
+    ('pc-', 48),
+    ('pc=6', 214),
+    ('ot=7', 231),
+])
+def test_get_hash_value_of_string(input, expected):
+    assert get_hash_value_of_string(input) == expected
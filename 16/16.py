@@ -1,6 +1,15 @@
 import itertools
+import os
+import sys
 
-from collections import namedtuple, defaultdict
+from array import array
+from collections import namedtuple
+
+# make the shared aoc package importable when run as a script from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc import instrument
+from aoc.grid import CharGrid
 
 
 TEST_GRID_FILE = 'test.txt'
@@ -34,20 +43,208 @@ REFLECTOR_TRANSLATIONS = {
 }
 
 
+DIRECTION_STEPS = {
+    DIRECTION_UP: (0, -1),
+    DIRECTION_DOWN: (0, 1),
+    DIRECTION_LEFT: (-1, 0),
+    DIRECTION_RIGHT: (1, 0)
+}
+
+# compact integer codes used by the bytearray simulator. the visited mask of a cell holds one bit per code.
+DIRECTION_CODES = {
+    DIRECTION_UP: 0,
+    DIRECTION_RIGHT: 1,
+    DIRECTION_DOWN: 2,
+    DIRECTION_LEFT: 3
+}
+
+# the bit of each direction in a visited mask
+DIRECTION_BITS = {direction: 1 << code for direction, code in DIRECTION_CODES.items()}
+
+DEFLECTOR_TILES = (VERTICAL_SPLIT_TILE, HORIZONTAL_SPLIT_TILE, MIRROR_BACK_TILE, MIRROR_FORWARD_TILE)
+
+# the last mark a batch run can use in the byte-sized visited buffers of get_energised_cells_for_starts
+MAX_RUN_MARK = 255
+
+# set_tile_symbol re-simulates every tracked start in one batch once more than this fraction of them are affected
+FULL_RETRACK_FRACTION = 0.75
+
+
 Position = namedtuple('Position', ('x', 'y'))
 
+
+def get_outgoing_directions(symbol, direction):
+    """The directions a beam leaves a tile in, given the tile symbol and the direction the beam entered with."""
+    if symbol == VERTICAL_SPLIT_TILE and direction in (DIRECTION_LEFT, DIRECTION_RIGHT):
+        return (DIRECTION_UP, DIRECTION_DOWN)
+    elif symbol == HORIZONTAL_SPLIT_TILE and direction in (DIRECTION_UP, DIRECTION_DOWN):
+        return (DIRECTION_RIGHT, DIRECTION_LEFT)
+    elif symbol in REFLECTOR_TRANSLATIONS:
+        return (REFLECTOR_TRANSLATIONS[symbol][direction],)
+
+    return (direction,)
+
+
+def _build_beam_transitions():
+    """Table indexed by [symbol byte][direction code] giving the outgoing direction codes."""
+    transitions = [tuple((code,) for code in range(4))] * 256
+    for symbol in (EMPTY_TILE,) + DEFLECTOR_TILES:
+        transitions[ord(symbol)] = tuple(
+            tuple(DIRECTION_CODES[new_direction] for new_direction in get_outgoing_directions(symbol, direction))
+            for direction, _ in sorted(DIRECTION_CODES.items(), key=lambda direction_code: direction_code[1])
+        )
+    return transitions
+
+BEAM_TRANSITIONS = _build_beam_transitions()
+
+
+def build_beam_successors(grid):
+    """
+    For every beam state (cell index << 2 | direction code) of a CharGrid, the state the beam moves into next. Cell
+    indexes are the grid's own flat indexes, so a grid mapped from a file keeps its line endings as cells no beam
+    reaches. Returns an array with one slot per state, -1 where the beam leaves the grid, and a dict of the few states
+    that split to their second successor state.
+
+    The table is first filled as if every cell were empty, with one strided slice per direction, then the grid's
+    edges and line endings are cut off the same way, so only the deflector cells are worked out one by one.
+    """
+    width, height, stride = grid.width, grid.height, grid.stride
+    num_states = height * stride * 4
+    successors = array('i', [0]) * num_states
+
+    # an empty cell passes the beam on to the neighbour in its direction (up, right, down, left) in the same direction
+    for code, step in enumerate((-stride, 1, stride, -1)):
+        successors[code::4] = array('i', range(code + step * 4, code + step * 4 + num_states, 4))
+
+    def cut(states):
+        successors[states] = array('i', [-1]) * len(range(num_states)[states])
+
+    cut(slice(DIRECTION_CODES[DIRECTION_UP], width * 4, 4))
+    cut(slice((height - 1) * stride * 4 + DIRECTION_CODES[DIRECTION_DOWN], num_states, 4))
+    cut(slice(DIRECTION_CODES[DIRECTION_LEFT], num_states, stride * 4))
+    cut(slice((width - 1) * 4 + DIRECTION_CODES[DIRECTION_RIGHT], num_states, stride * 4))
+    for x in range(width, stride):
+        for code in range(4):
+            cut(slice(x * 4 + code, num_states, stride * 4))
+
+    splits = {}
+    for symbol in DEFLECTOR_TILES:
+        for index in grid.find_all(symbol):
+            cell_successors, cell_splits = get_cell_beam_successors(grid, index)
+            successors[index * 4:index * 4 + 4] = array('i', cell_successors)
+            splits.update(cell_splits)
+
+    return successors, splits
+
+
+def get_cell_beam_successors(grid, index):
+    """The successors of the four beam states of a single cell, in direction code order, and their splits."""
+    x, y = grid.position(index)
+    if x >= grid.width:
+        return [-1] * 4, {}
+
+    neighbours = (
+        index - grid.stride if y > 0 else -1,
+        index + 1 if x < grid.width - 1 else -1,
+        index + grid.stride if y < grid.height - 1 else -1,
+        index - 1 if x > 0 else -1
+    )
+    successors = []
+    splits = {}
+    for code, outgoing in enumerate(BEAM_TRANSITIONS[grid.data[index]]):
+        next_states = [neighbours[out_code] << 2 | out_code for out_code in outgoing if neighbours[out_code] >= 0]
+        successors.append(next_states[0] if next_states else -1)
+        if len(next_states) > 1:
+            splits[index << 2 | code] = next_states[1]
+    return successors, splits
+
+
+def trace_beam(successors, splits, visited, start_state):
+    """
+    Follow a beam through the states in successors and splits (see build_beam_successors), marking the direction bit
+    it enters each cell with in visited. Split beams go on an explicit stack of state ints.
+    """
+    stack = [start_state]
+
+    while stack:
+        state = stack.pop()
+        while True:
+            index = state >> 2
+            bit = 1 << (state & 3)
+            if visited[index] & bit:
+                break
+            visited[index] |= bit
+
+            if state in splits:
+                stack.append(splits[state])
+            state = successors[state]
+            if state < 0:
+                break
+
+
+def trace_beam_marked(successors, splits, state_marks, cell_marks, mark, start_state):
+    """
+    As trace_beam, for batches of starts that share one pair of buffers instead of a fresh visited mask per start. A
+    state (or cell) has been visited in this run if its entry in state_marks (or cell_marks) is mark, so the next run
+    only needs a new mark: nothing is reset. Returns the indexes of the cells energised, in the order first reached.
+    """
+    energised = []
+    stack = [start_state]
+
+    while stack:
+        state = stack.pop()
+        while True:
+            if state_marks[state] == mark:
+                break
+            state_marks[state] = mark
+            index = state >> 2
+            if cell_marks[index] != mark:
+                cell_marks[index] = mark
+                energised.append(index)
+
+            if state in splits:
+                stack.append(splits[state])
+            state = successors[state]
+            if state < 0:
+                break
+
+    return energised
+
+
 class Tile:
+    """
+    A view of one cell of the grid, created on demand. The symbol lives in the grid's CharGrid, and beam state in its
+    visited mask, shared with the fast simulator. Grid.get_tile hands out one shared view per cell.
+    """
+    __slots__ = ('grid', 'position', 'index')
 
-    def __init__(self, grid, position, symbol):
+    def __init__(self, grid, position):
         self.grid = grid
         self.position = position
-        self.symbol = symbol
-        self.energised = False
-        self.direction_history = set()
+        self.index = grid.grid.index(position.x, position.y)
+
+    @property
+    def symbol(self):
+        return chr(self.grid.grid.data[self.index])
+
+    @property
+    def energised(self):
+        return self.grid.visited[self.index] != 0
+
+    @property
+    def direction_history(self):
+        mask = self.grid.visited[self.index]
+        return {direction for direction, code in DIRECTION_CODES.items() if mask & (1 << code)}
+
+    def has_direction(self, direction):
+        """Has a beam entered this tile travelling direction? Tests the visited bit, without building a set."""
+        return self.grid.visited[self.index] & DIRECTION_BITS[direction] != 0
+
+    def record_direction(self, direction):
+        self.grid.visited[self.index] |= DIRECTION_BITS[direction]
 
     def reset_tile(self):
-        self.energised = False
-        self.direction_history = set()
+        self.grid.visited[self.index] = 0
 
     def __repr__(self):
         return "<Tile {}: {}>".format(self.position, self.symbol)
@@ -66,54 +263,50 @@ class Tile:
 
 
 class Laser:
+    __slots__ = ('grid', 'position', 'direction', 'split_lasers', 'checked_tile')
 
     def __init__(self, grid, start_position, start_direction):
         self.grid = grid
         self.position = start_position
         self.direction = start_direction
+        # the next tile, as found by can_continue, for the progress call that follows it
+        self.checked_tile = None
 
         tile = self.grid.get_tile(start_position)
-        tile.energised = True
-        self.direction, _ = self.get_new_direction_and_new_lasers(tile)
+        tile.record_direction(start_direction)
+        self.direction, self.split_lasers = self.get_new_direction_and_new_lasers(tile)
 
     @staticmethod
     def get_starting_lasers_for_laser(grid, laser_position, laser_direction):
         """A laser could immediately change direction or split upon being created. Use this method to go from a notional
         starting laser to a real set of starting lasers, with adjusted direction."""
-        return []
+        laser = Laser(grid, laser_position, laser_direction)
+        return [laser] + laser.split_lasers
 
     def next_tile(self):
-        if self.direction == DIRECTION_UP:
-            return self.grid.get_tile((self.position.x, self.position.y-1))
-        elif self.direction == DIRECTION_DOWN:
-            return self.grid.get_tile((self.position.x, self.position.y+1))
-        elif self.direction == DIRECTION_LEFT:
-            return self.grid.get_tile((self.position.x-1, self.position.y))
-        elif self.direction == DIRECTION_RIGHT:
-            return self.grid.get_tile((self.position.x+1, self.position.y))
+        x, y = self.position
+        step_x, step_y = DIRECTION_STEPS[self.direction]
+        return self.grid.get_tile((x + step_x, y + step_y))
 
     def can_continue(self):
-        next_tile = self.next_tile()
-
-        if next_tile and self.direction in next_tile.direction_history:
-            return False
-
-        return next_tile is not None
+        next_tile = self.checked_tile = self.next_tile()
+        return next_tile is not None and not next_tile.has_direction(self.direction)
 
     def get_new_direction_and_new_lasers(self, new_tile):
         new_lasers = []
         new_direction = self.direction
+        symbol = new_tile.symbol
 
-        if new_tile.symbol == VERTICAL_SPLIT_TILE and self.direction in (DIRECTION_LEFT, DIRECTION_RIGHT):
+        if symbol == VERTICAL_SPLIT_TILE and self.direction in (DIRECTION_LEFT, DIRECTION_RIGHT):
             # follow laser upwards, return new laser going downward
             new_direction = DIRECTION_UP
             new_lasers.append(Laser(self.grid, self.position, DIRECTION_DOWN))
-        elif new_tile.symbol == HORIZONTAL_SPLIT_TILE and self.direction in (DIRECTION_UP, DIRECTION_DOWN):
+        elif symbol == HORIZONTAL_SPLIT_TILE and self.direction in (DIRECTION_UP, DIRECTION_DOWN):
             # follow laser right, return new laser going leftward
             new_direction = DIRECTION_RIGHT
             new_lasers.append(Laser(self.grid, self.position, DIRECTION_LEFT))
-        elif new_tile.symbol in (MIRROR_BACK_TILE, MIRROR_FORWARD_TILE):
-            new_direction = REFLECTOR_TRANSLATIONS[new_tile.symbol][self.direction]
+        elif symbol in (MIRROR_BACK_TILE, MIRROR_FORWARD_TILE):
+            new_direction = REFLECTOR_TRANSLATIONS[symbol][self.direction]
 
         return new_direction, new_lasers
 
@@ -122,44 +315,238 @@ class Laser:
         Moves position of this laser, and returns any newly created lasers.
         Does not check if next tile is a valid continuation.
         """
-        new_tile = self.next_tile()
-        new_tile.direction_history.add(self.direction)
+        if instrument.enabled:
+            instrument.count('laser.steps')
+        new_tile = self.checked_tile or self.next_tile()
+        self.checked_tile = None
+        new_tile.record_direction(self.direction)
 
         self.position = new_tile.position
-        new_tile.energised = True
 
         self.direction, new_lasers = self.get_new_direction_and_new_lasers(new_tile)
 
         return new_lasers
 
 
+class BeamSegmentGraph:
+    """
+    Precomputed beam paths between deflectors (splitters and mirrors).
+
+    Each node is a (position, direction) pair for a beam leaving a deflector tile. Its segment is the set of tiles the
+    beam crosses until it is deflected again (or leaves the grid), held as an int bitset indexed by y * width + x.
+    Nodes are condensed into strongly connected components so the energised set of every node is computed once, and
+    a start is then answered by walking a single segment and unioning the precomputed sets.
+
+    Only the starts given (by default, every edge start) can be answered: the energised sets are kept just for the
+    nodes their first segments lead to, and every other set is dropped once the components that need it are done.
+    """
+
+    def __init__(self, grid, starts=None):
+        self.grid = grid
+        self.width, self.height = grid.size()
+        self.successors = {}
+        segment_tiles = {}
+
+        for tile in itertools.chain(*grid.tiles):
+            position = tile.position
+            if tile.symbol not in DEFLECTOR_TILES:
+                continue
+            for direction in DIRECTION_STEPS:
+                if direction not in self._emitted_directions(tile.symbol):
+                    continue
+                node = (position, direction)
+                tiles, successors = self._walk_segment(position, direction)
+                segment_tiles[node] = tiles | self._tile_bit(position)
+                self.successors[node] = successors
+
+        entry_nodes = {
+            node
+            for start in (grid.get_edge_starts() if starts is None else starts)
+            for _, successors in self._walk_start_segments(*start)
+            for node in successors
+        }
+        self.energised = self._condense(segment_tiles, entry_nodes)
+        instrument.count('beam_graph.nodes', len(self.successors))
+        instrument.count('beam_graph.components', self.num_components)
+
+    @staticmethod
+    def _emitted_directions(symbol):
+        if symbol == VERTICAL_SPLIT_TILE:
+            return (DIRECTION_UP, DIRECTION_DOWN)
+        elif symbol == HORIZONTAL_SPLIT_TILE:
+            return (DIRECTION_LEFT, DIRECTION_RIGHT)
+        return tuple(DIRECTION_STEPS)
+
+    def _tile_bit(self, position):
+        return 1 << (position.y * self.width + position.x)
+
+    def _walk_segment(self, position, direction):
+        """Follow a beam from (but not including) position until it is deflected. Returns the tiles crossed and the
+        nodes the beam continues as."""
+        step_x, step_y = DIRECTION_STEPS[direction]
+        x, y = position
+        tiles = 0
+
+        while True:
+            x += step_x
+            y += step_y
+            tile = self.grid.get_tile((x, y))
+            if tile is None:
+                return tiles, ()
+
+            tiles |= self._tile_bit(tile.position)
+            new_directions = get_outgoing_directions(tile.symbol, direction)
+            if new_directions != (direction,):
+                return tiles, tuple((tile.position, new_direction) for new_direction in new_directions)
+
+    def _walk_start_segments(self, start_position, start_direction):
+        """The (tiles, successor nodes) of each segment a beam entering at start_position first follows."""
+        start_tile = self.grid.get_tile(start_position)
+        return [
+            self._walk_segment(start_tile.position, direction)
+            for direction in get_outgoing_directions(start_tile.symbol, start_direction)
+        ]
+
+    def _components(self):
+        """
+        The strongly connected components of the nodes, by Tarjan's algorithm run iteratively. Components come off the
+        stack in reverse topological order, so each one's successor components come before it.
+        """
+        index = {}
+        low_link = {}
+        components = []
+        stack = []
+        on_stack = set()
+
+        for root in self.successors:
+            if root in index:
+                continue
+
+            index[root] = low_link[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.successors[root]))]
+
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low_link[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.successors[child])))
+                        break
+                    elif child in on_stack:
+                        low_link[node] = min(low_link[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low_link[parent] = min(low_link[parent], low_link[node])
+
+                    if low_link[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+
+        return components
+
+    def _condense(self, segment_tiles, entry_nodes):
+        """
+        The energised set of each entry node: the union of the segments of every node reachable from it. Each
+        component's set is built once, from its own segments and its successor components' sets, and a set is freed
+        as soon as every component that needs it is built (unless it belongs to an entry node), so only a frontier of
+        full-grid bitsets is held at once. segment_tiles is consumed.
+        """
+        components = self._components()
+        component_of = {member: number for number, component in enumerate(components) for member in component}
+        successor_components = [
+            {component_of[child] for member in component for child in self.successors[member]} - {number}
+            for number, component in enumerate(components)
+        ]
+        entry_components = {component_of[node] for node in entry_nodes}
+        pending_uses = [0] * len(components)
+        for successors in successor_components:
+            for successor in successors:
+                pending_uses[successor] += 1
+
+        component_energised = {}
+        for number, component in enumerate(components):
+            energised = 0
+            for member in component:
+                energised |= segment_tiles.pop(member)
+            for successor in successor_components[number]:
+                energised |= component_energised[successor]
+                pending_uses[successor] -= 1
+                if not pending_uses[successor] and successor not in entry_components:
+                    del component_energised[successor]
+            if pending_uses[number] or number in entry_components:
+                component_energised[number] = energised
+
+        self.num_components = len(components)
+        return {node: component_energised[component_of[node]] for node in entry_nodes}
+
+    def energised_tiles(self, start_position, start_direction):
+        """Bitset of the tiles energised by a beam entering the grid at start_position, travelling start_direction."""
+        instrument.count('beam_graph.starts')
+        energised = self._tile_bit(Position(*start_position))
+
+        for tiles, successors in self._walk_start_segments(start_position, start_direction):
+            energised |= tiles
+            for node in successors:
+                energised |= self.energised[node]
+
+        return energised
+
+    def number_energised_tiles(self, start_position, start_direction):
+        return self.energised_tiles(start_position, start_direction).bit_count()
+
+
 class Grid:
     
     def __init__(self, input_lines):
-        self.grid = {}
-        for y, line in enumerate(input_lines):
-            for x, symbol in enumerate(line.strip()):
-                pos = Position(x, y)
-                self.grid[pos] = Tile(grid=self, position=pos, symbol=symbol)
+        """input_lines is the grid's lines, or a CharGrid (as mapped by CharGrid.from_file)."""
+        self.grid = input_lines if isinstance(input_lines, CharGrid) else CharGrid.from_lines(input_lines)
+        self.width = self.grid.width
+        self.height = self.grid.height
+        self.stride = self.grid.stride
+        self.visited = bytearray(self.height * self.stride)
+        self.beam_successors, self.beam_splits = build_beam_successors(self.grid)
+
+        # populated by track_edge_starts, and kept up to date by set_tile_symbol
+        self.energised_by_start = {}
+        self.cells_by_start = None
+        self.optimal_energised_tiles = None
+
+        # shared visited buffers for trace_beam_marked, created on first use by get_energised_cells_for_starts. Marks
+        # are single bytes, so after every 255 runs both buffers are cleared and the marks start again from 1
+        self._state_marks = None
+        self._cell_marks = None
+        self._run_mark = 0
+
+        # Tile views, created on first use by get_tile and then reused, so stepping Laser objects allocates no tiles
+        self._tile_views = None
 
     @property
     def tiles(self):
-        tiles_by_row = defaultdict(list)
-        for tile in self.grid.values():
-            tiles_by_row[tile.position.y].append(tile)
-
-        return [sorted(tiles, key=lambda tile: tile.position.x) for y, tiles in sorted(tiles_by_row.items(), key=lambda y_tiles: y_tiles[0])]
-
+        return [[self.get_tile((x, y)) for x in range(self.width)] for y in range(self.height)]
 
     def __repr__(self):
-        return '\n'.join(''.join(tile.symbol for tile in tile_row) for tile_row in self.tiles)
+        return str(self.grid)
 
     def energised_map(self):
-        print('\n'.join(''.join('#' if tile.energised else '.' for tile in tile_row) for tile_row in self.tiles))
+        print('\n'.join(
+            ''.join('#' if energised else '.' for energised in self.visited[y*self.stride:y*self.stride+self.width])
+            for y in range(self.height)
+        ))
 
     def size(self):
-        xs, ys = zip(*map(tuple, self.grid.keys()))
-        return max(xs) + 1, max(ys) + 1
+        return self.width, self.height
         
 
     def get_edge_tile_positions(self):
@@ -190,39 +577,358 @@ class Grid:
         return directions
 
     def get_tile(self, position):
-        return self.grid.get(position, None)
+        x, y = position
+        # bounds and index worked out inline, as Laser objects look up a tile on every step
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+
+        if self._tile_views is None:
+            self._tile_views = [None] * len(self.visited)
+        index = y * self.stride + x
+        tile = self._tile_views[index]
+        if tile is None:
+            tile = self._tile_views[index] = Tile(self, Position(x, y))
+        return tile
 
     def reset_all_tiles(self):
-        for tile in self.grid.values():
-            tile.reset_tile()
+        self.visited = bytearray(self.height * self.stride)
+
+    def get_edge_starts(self):
+        """Every (position, direction) a beam can enter the grid with."""
+        return [
+            (start_position, direction)
+            for start_position in self.get_edge_tile_positions()
+            for direction in self.get_directions_from_edge(start_position)
+        ]
 
     def get_optimal_energised_tiles(self):
-        energised = []
+        beam_graph = BeamSegmentGraph(self)
+        return max(beam_graph.number_energised_tiles(*start) for start in self.get_edge_starts())
+
+    def get_energised_tiles_by_start_parallel(self, processes=None, mp_context=None):
+        """
+        Simulate every edge start across a pool of worker processes. The grid is sent to each worker once, through
+        the pool initializer, and each worker simulates a slice of the starts on its own copy.
+        Returns the best number of energised tiles and a dict of the number energised for every start.
+        """
+        # imported here, as the multiprocessing machinery would dominate the module's import time
+        from concurrent.futures import ProcessPoolExecutor
 
-        for start_position in self.get_edge_tile_positions():
-            for direction in self.get_directions_from_edge(start_position):
-                self.reset_all_tiles()
-                print("Starting from {}, going {}".format(start_position, direction))
-                self.fire_laser(laser_start=start_position, start_direction=direction)
-                energised.append(self.number_energised_tiles())
-                print(energised)
+        from aoc import workers
 
-        return max(energised)
+        processes = processes or os.cpu_count()
+        starts = self.get_edge_starts()
+        slices = [starts[i::processes * 4] for i in range(processes * 4)]
+        rows = self.grid.lines()
+
+        energised_by_start = {}
+        with ProcessPoolExecutor(
+            max_workers=processes, mp_context=mp_context, initializer=workers.init_beam_grid, initargs=(rows,)
+        ) as executor:
+            for counts in executor.map(workers.count_energised_tiles_for_starts, slices):
+                energised_by_start.update(counts)
+
+        return max(energised_by_start.values()), energised_by_start
 
     def fire_laser(self, laser_start=Position(x=0, y=0), start_direction=DIRECTION_RIGHT):
-        lasers = [Laser(grid=self, start_position=laser_start, start_direction=start_direction)]
+        start_index = self.grid.index(*laser_start)
+        if instrument.enabled:
+            # every beam step sets exactly one new direction bit
+            bits_before = sum(map(int.bit_count, self.visited))
+
+        start_state = start_index << 2 | DIRECTION_CODES[start_direction]
+        trace_beam(self.beam_successors, self.beam_splits, self.visited, start_state)
+
+        if instrument.enabled:
+            instrument.count('beam.traces')
+            instrument.count('beam.steps', sum(map(int.bit_count, self.visited)) - bits_before)
+
+    def fire_laser_objects(self, laser_start=Position(x=0, y=0), start_direction=DIRECTION_RIGHT):
+        """Reference implementation of fire_laser, stepping Laser objects tile by tile."""
+        lasers = Laser.get_starting_lasers_for_laser(self, laser_start, start_direction)
         while lasers:
             laser = lasers.pop()
             while laser.can_continue():
                 lasers.extend(laser.progress())
 
     def number_energised_tiles(self):
-        return sum(tile.energised for tile in self.grid.values())
+        return len(self.visited) - self.visited.count(0)
+
+    def get_energised_cells_for_starts(self, starts):
+        """
+        Simulate a batch of (position, direction) starts on one shared visited buffer, yielding each start with the
+        indexes of the cells its beam energised. Unlike fire_laser, no start pays to reset or count the whole grid.
+        """
+        if self._state_marks is None:
+            self._state_marks = bytearray(len(self.beam_successors))
+            self._cell_marks = bytearray(len(self.visited))
+
+        for start_position, direction in starts:
+            if self._run_mark == MAX_RUN_MARK:
+                self._state_marks[:] = bytes(len(self._state_marks))
+                self._cell_marks[:] = bytes(len(self._cell_marks))
+                self._run_mark = 0
+            self._run_mark += 1
+            start_state = self.grid.index(*start_position) << 2 | DIRECTION_CODES[direction]
+            energised = trace_beam_marked(
+                self.beam_successors, self.beam_splits, self._state_marks, self._cell_marks, self._run_mark, start_state
+            )
+            instrument.count('beam.traces')
+            yield (start_position, direction), energised
+
+    def get_energised_tiles_by_start(self, starts=None):
+        """The number of tiles energised from each start (by default, every edge start) simulated in one batch."""
+        starts = self.get_edge_starts() if starts is None else starts
+        return {start: len(energised) for start, energised in self.get_energised_cells_for_starts(starts)}
+
+    def track_edge_starts(self):
+        """
+        Simulate every edge start, recording the energised count of each and an array of the cells its beam crossed,
+        so that set_tile_symbol can find the starts crossing a tile with one scan of each array (in C), and only
+        re-simulate those. Returns the best number of energised tiles.
+        """
+        self.energised_by_start = {}
+        self.cells_by_start = {}
+
+        self._track_starts(self.get_edge_starts())
+
+        self.optimal_energised_tiles = max(self.energised_by_start.values())
+        return self.optimal_energised_tiles
+
+    def _track_starts(self, starts):
+        for start, cell_indexes in self.get_energised_cells_for_starts(starts):
+            self.cells_by_start[start] = array('i', cell_indexes)
+            self.energised_by_start[start] = len(cell_indexes)
+
+    def set_tile_symbol(self, position, symbol):
+        """
+        Change the symbol of a tile. If edge starts are being tracked, only the starts whose beams crossed the tile
+        are re-simulated. Returns the best number of energised tiles (None when not tracking).
+        """
+        index = self.grid.index(*position)
+        self.grid[position] = symbol
+        cell_successors, cell_splits = get_cell_beam_successors(self.grid, index)
+        self.beam_successors[index*4:index*4+4] = array('i', cell_successors)
+        for state in range(index << 2, (index + 1) << 2):
+            self.beam_splits.pop(state, None)
+        self.beam_splits.update(cell_splits)
+
+        if self.cells_by_start is None:
+            return None
+
+        affected_starts = [start for start, cell_indexes in self.cells_by_start.items() if index in cell_indexes]
+        if len(affected_starts) > FULL_RETRACK_FRACTION * len(self.cells_by_start):
+            affected_starts = list(self.cells_by_start)
+        self._track_starts(affected_starts)
+
+        self.optimal_energised_tiles = max(self.energised_by_start.values())
+        return self.optimal_energised_tiles
+
+
+TEST_GRID = r"""
+.|...\....
+|.-.\.....
+.....|-...
+........|.
+..........
+.........\
+..../.\\..
+.-.-/..|..
+.|....-|.\
+..//.|....""".strip().splitlines()
+
+
+def test_build_beam_successors_matches_cell_by_cell(tmp_path):
+    grid_file = tmp_path / 'grid.txt'
+    grid_file.write_bytes('\r\n'.join(TEST_GRID).encode())
+
+    for grid in (CharGrid.from_lines(TEST_GRID), CharGrid.from_file(grid_file)):
+        expected_successors, expected_splits = array('i'), {}
+        for index in range(grid.height * grid.stride):
+            cell_successors, cell_splits = get_cell_beam_successors(grid, index)
+            expected_successors.extend(cell_successors)
+            expected_splits.update(cell_splits)
+
+        assert build_beam_successors(grid) == (expected_successors, expected_splits)
+
+
+def test_fire_laser():
+    grid = Grid(TEST_GRID)
+    grid.fire_laser()
+    assert grid.number_energised_tiles() == 46
+
+
+def test_fire_laser_matches_laser_objects():
+    grid = Grid(TEST_GRID)
+
+    for start_position in grid.get_edge_tile_positions():
+        for direction in grid.get_directions_from_edge(start_position):
+            grid.reset_all_tiles()
+            grid.fire_laser_objects(laser_start=start_position, start_direction=direction)
+            expected = [tile.energised for tile in itertools.chain(*grid.tiles)]
+
+            grid.reset_all_tiles()
+            grid.fire_laser(laser_start=start_position, start_direction=direction)
+            assert [tile.energised for tile in itertools.chain(*grid.tiles)] == expected
+
+
+def test_tile_has_direction_matches_direction_history():
+    grid = Grid(TEST_GRID)
+    grid.fire_laser()
+
+    for tile in itertools.chain(*grid.tiles):
+        assert {direction for direction in DIRECTION_STEPS if tile.has_direction(direction)} == tile.direction_history
+
+
+def test_tiles_are_shared_slotted_views():
+    grid = Grid(TEST_GRID)
+    tile = grid.get_tile((1, 1))
+
+    assert tile is grid.get_tile(Position(1, 1)) is grid.get_tile((1, 0)).tile_below()
+    assert grid.get_tile((-1, 0)) is None
+    assert not hasattr(tile, '__dict__')
+    assert not hasattr(Laser(grid, Position(0, 0), DIRECTION_RIGHT), '__dict__')
+
+
+def test_beam_segment_graph_matches_fire_laser():
+    grid = Grid(TEST_GRID)
+    beam_graph = BeamSegmentGraph(grid)
+
+    for start_position in grid.get_edge_tile_positions():
+        for direction in grid.get_directions_from_edge(start_position):
+            grid.reset_all_tiles()
+            grid.fire_laser(laser_start=start_position, start_direction=direction)
+            assert beam_graph.number_energised_tiles(start_position, direction) == grid.number_energised_tiles()
+
+
+def test_beam_segment_graph_keeps_sets_for_its_starts_only():
+    grid = Grid(TEST_GRID)
+    beam_graph = BeamSegmentGraph(grid, starts=[(Position(0, 0), DIRECTION_RIGHT)])
+
+    assert beam_graph.number_energised_tiles(Position(0, 0), DIRECTION_RIGHT) == 46
+    assert len(beam_graph.energised) < len(BeamSegmentGraph(grid).energised) < len(beam_graph.successors)
+    assert not hasattr(beam_graph, 'segment_tiles')
+
+
+def test_get_optimal_energised_tiles():
+    assert Grid(TEST_GRID).get_optimal_energised_tiles() == 51
+
+
+def test_get_energised_tiles_by_start_parallel():
+    import multiprocessing
+
+    grid = Grid(TEST_GRID)
+    beam_graph = BeamSegmentGraph(grid)
+
+    expected = {start: beam_graph.number_energised_tiles(*start) for start in grid.get_edge_starts()}
+
+    # spawned workers import everything afresh, as forkserver ones do too
+    for mp_context in (None, multiprocessing.get_context('spawn')):
+        best, energised_by_start = grid.get_energised_tiles_by_start_parallel(processes=2, mp_context=mp_context)
+
+        assert best == 51
+        assert energised_by_start == expected
+
+
+def test_get_energised_tiles_by_start_matches_fire_laser():
+    grid = Grid(TEST_GRID)
+    energised_by_start = grid.get_energised_tiles_by_start()
+
+    for start in grid.get_edge_starts():
+        grid.reset_all_tiles()
+        grid.fire_laser(*start)
+        assert energised_by_start[start] == grid.number_energised_tiles()
+
+    # a second batch on the same buffers gives the same counts
+    assert grid.get_energised_tiles_by_start() == energised_by_start
+
+
+def test_get_energised_tiles_by_start_wraps_run_marks(monkeypatch):
+    expected = Grid(TEST_GRID).get_energised_tiles_by_start()
+    monkeypatch.setitem(globals(), 'MAX_RUN_MARK', 3)
+
+    grid = Grid(TEST_GRID)
+    assert grid.get_energised_tiles_by_start() == expected
+    assert grid.get_energised_tiles_by_start() == expected
+    assert grid._run_mark <= 3
+
+
+def test_set_tile_symbol_updates_tracked_starts():
+    grid = Grid(TEST_GRID)
+    assert grid.track_edge_starts() == 51
+
+    for position, symbol in [((3, 0), MIRROR_FORWARD_TILE), ((1, 0), EMPTY_TILE), ((6, 7), VERTICAL_SPLIT_TILE)]:
+        best = grid.set_tile_symbol(position, symbol)
+
+        edited_grid = Grid(repr(grid).splitlines())
+        assert repr(edited_grid) == repr(grid)
+        assert best == edited_grid.get_optimal_energised_tiles()
+        assert grid.energised_by_start == {
+            start: BeamSegmentGraph(edited_grid).number_energised_tiles(*start) for start in grid.get_edge_starts()
+        }
+
+
+def test_set_tile_symbol_only_retraces_affected_starts(monkeypatch):
+    monkeypatch.setitem(globals(), 'FULL_RETRACK_FRACTION', 0.5)
+    grid = Grid(TEST_GRID)
+    grid.track_edge_starts()
+    num_starts = len(grid.cells_by_start)
+
+    instrument.enable()
+    try:
+        # (9, 9) is only crossed by the beams entering at that corner
+        grid.set_tile_symbol((9, 9), MIRROR_BACK_TILE)
+        few_traces = instrument.counters['beam.traces']
+        instrument.counters.clear()
+
+        # (0, 7) is on more than half of the beams' paths, so every start is retraced in one batch
+        grid.set_tile_symbol((0, 7), VERTICAL_SPLIT_TILE)
+        all_traces = instrument.counters['beam.traces']
+    finally:
+        instrument.disable()
+        instrument.reset()
+
+    assert 0 < few_traces < num_starts * FULL_RETRACK_FRACTION
+    assert all_traces == num_starts
+    assert grid.energised_by_start == Grid(repr(grid).splitlines()).get_energised_tiles_by_start()
+
+
+def test_grid_mapped_from_file(tmp_path):
+    grid_file = tmp_path / 'grid.txt'
+    # CRLF line endings and no final newline, so the mapped grid's stride is width + 2 and its last row is short
+    grid_file.write_bytes('\r\n'.join(TEST_GRID).encode())
+
+    grid = import_from_file(grid_file)
+    assert grid.stride == grid.width + 2
+    assert repr(grid) == repr(Grid(TEST_GRID))
+
+    grid.fire_laser()
+    assert grid.number_energised_tiles() == 46
+    assert grid.track_edge_starts() == 51
+    assert grid.get_energised_tiles_by_start() == Grid(TEST_GRID).get_energised_tiles_by_start()
+
+    best = grid.set_tile_symbol((6, 7), VERTICAL_SPLIT_TILE)
+    assert best == Grid(repr(grid).splitlines()).get_optimal_energised_tiles()
 
 
 def import_from_file(filename):
-    with open(filename, 'r') as f:
-        return Grid(f.readlines())
+    return Grid(CharGrid.from_file(filename))
+
+
+def part_1(filename):
+    with instrument.phase('parse'):
+        grid = import_from_file(filename)
+    with instrument.phase('solve'):
+        grid.fire_laser()
+    with instrument.phase('aggregate'):
+        return grid.number_energised_tiles()
+
+
+def part_2(filename):
+    with instrument.phase('parse'):
+        grid = import_from_file(filename)
+    with instrument.phase('solve'):
+        return grid.get_optimal_energised_tiles()
 
 
 def main():
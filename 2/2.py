@@ -1,6 +1,14 @@
+import bisect
+import itertools
+import os
+import sys
 from collections import defaultdict
 
-import pytest
+# make the shared aoc package importable when run as a script from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc import instrument
+from aoc.reader import iter_lines
 
 INPUT_FILE = 'input.txt'
 
@@ -8,6 +16,7 @@ INPUT_FILE = 'input.txt'
 BLUE = 'blue'
 RED = 'red'
 GREEN = 'green'
+COLOURS = (RED, GREEN, BLUE)
 
 TEST_GAMES = {
     1: [{BLUE: 3, RED: 4, GREEN: 0}, {RED: 1, GREEN: 2, BLUE: 6}, {GREEN: 2, RED: 0, BLUE: 0}],
@@ -23,20 +32,84 @@ def is_draw_possible(draw, bag_contents):
 def is_game_possible(game, bag_contents):
     return all(is_draw_possible(draw, bag_contents) for draw in game)
 
-@pytest.mark.parametrize(('game', 'possible'), [
-    [TEST_GAMES[1], True],
-    [TEST_GAMES[2], True],
-    [TEST_GAMES[3], False],
-    [TEST_GAMES[4], False],
-    [TEST_GAMES[5], True]
-])
-def test_is_game_possible(game, possible):
-    bag = {RED: 12, GREEN: 13, BLUE: 14}
-    assert is_game_possible(game, bag) is possible
-    
 def sum_possible_games(games, bag):
     return sum([(game_num if is_game_possible(game, bag) else 0) for game_num, game in games.items()])
 
+class GameIndex:
+    """
+    Answers repeated "which games are possible with this bag" queries, built once from each game's minimum cubes.
+
+    A game is possible exactly when the bag dominates its minimum cubes on every colour. Each colour's distinct
+    minimums are kept sorted, so a bag maps to a cell of the grid they make with one bisect per colour. A 3D prefix
+    sum over that grid holds the number and game-number sum of the games dominated by every cell, so count and sum
+    queries cost three bisects. Listing the games visits only the (red, green) cells under the bag, each of which
+    keeps its games sorted by blue.
+    """
+
+    def __init__(self, games):
+        minimum_cubes = {game_num: get_minimum_cubes(game) for game_num, game in games.items()}
+        self.values = {
+            colour: sorted({cubes[colour] for cubes in minimum_cubes.values()}) for colour in COLOURS
+        }
+        self.shape = tuple(len(self.values[colour]) + 1 for colour in COLOURS)
+
+        # 1-based grid coordinates: cell 0 on any axis is below every game's minimum
+        self.counts = [0] * (self.shape[0] * self.shape[1] * self.shape[2])
+        self.sums = [0] * len(self.counts)
+        games_by_cell = defaultdict(list)
+        for game_num, cubes in minimum_cubes.items():
+            red, green, blue = (bisect.bisect_left(self.values[colour], cubes[colour]) + 1 for colour in COLOURS)
+            self.counts[self._cell(red, green, blue)] += 1
+            self.sums[self._cell(red, green, blue)] += game_num
+            games_by_cell[red, green].append((blue, game_num))
+
+        for table in (self.counts, self.sums):
+            self._accumulate(table)
+
+        self.blues_by_cell = {}
+        self.games_by_cell = {}
+        for cell, blue_and_games in games_by_cell.items():
+            blue_and_games.sort()
+            self.blues_by_cell[cell] = [blue for blue, _ in blue_and_games]
+            self.games_by_cell[cell] = [game_num for _, game_num in blue_and_games]
+
+    def _cell(self, red, green, blue):
+        return (red * self.shape[1] + green) * self.shape[2] + blue
+
+    def _accumulate(self, table):
+        """Turn per-cell totals into totals over every cell each cell dominates, one axis at a time."""
+        steps = (self.shape[1] * self.shape[2], self.shape[2], 1)
+        for axis, step in enumerate(steps):
+            for index in range(len(table)):
+                if (index // step) % self.shape[axis]:
+                    table[index] += table[index - step]
+
+    def _bag_cell(self, bag):
+        return tuple(bisect.bisect_right(self.values[colour], bag[colour]) for colour in COLOURS)
+
+    def count_possible_games(self, bag):
+        return self.counts[self._cell(*self._bag_cell(bag))]
+
+    def sum_possible_games(self, bag):
+        """The same as sum_possible_games(games, bag)."""
+        return self.sums[self._cell(*self._bag_cell(bag))]
+
+    def get_possible_games(self, bag):
+        """The numbers of the games possible with the bag, in ascending order."""
+        red, green, blue = self._bag_cell(bag)
+        possible_games = []
+        for cell in itertools.product(range(1, red + 1), range(1, green + 1)):
+            if cell in self.blues_by_cell:
+                num_possible = bisect.bisect_right(self.blues_by_cell[cell], blue)
+                possible_games.extend(self.games_by_cell[cell][:num_possible])
+
+        return sorted(possible_games)
+
+    def sum_possible_games_bulk(self, bags):
+        """sum_possible_games for each of many bags."""
+        return [self.sums[self._cell(*self._bag_cell(bag))] for bag in bags]
+
+
 def _parse_draw(draw_text):
     
     # small function to return the int contents of a string containing digits and letters
@@ -71,12 +144,24 @@ def sum_power_minimum_sets(games):
     powers = [power_of_cubes(cubes) for cubes in minimum_cubes]
     return sum(powers)
 
+def import_games_from_file(filename):
+    return {game_num: game for game_num, game in [parse_game(l) for l in iter_lines(filename, decode=True)]}
+
 def main(games):
     return sum_power_minimum_sets(games)
     # return sum_possible_games(games, {RED: 12, GREEN: 13, BLUE: 14})
 
-if __name__ == '__main__':
-    with open(INPUT_FILE, 'r') as f:
-        games = {game_num: game for game_num, game in [parse_game(l) for l in f.readlines()]}
+def part_1(filename):
+    with instrument.phase('parse'):
+        games = import_games_from_file(filename)
+    with instrument.phase('solve'):
+        return sum_possible_games(games, {RED: 12, GREEN: 13, BLUE: 14})
 
-    print(main(games))
+def part_2(filename):
+    with instrument.phase('parse'):
+        games = import_games_from_file(filename)
+    with instrument.phase('solve'):
+        return sum_power_minimum_sets(games)
+
+if __name__ == '__main__':
+    print(main(import_games_from_file(INPUT_FILE)))
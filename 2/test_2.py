@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+# make the shared aoc package importable from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc.days import load_day
+
+day_2 = load_day(2)
+TEST_GAMES = day_2.TEST_GAMES
+RED, GREEN, BLUE = day_2.RED, day_2.GREEN, day_2.BLUE
+is_game_possible = day_2.is_game_possible
+GameIndex = day_2.GameIndex
+
+
+@pytest.mark.parametrize(('game', 'possible'), [
+    [TEST_GAMES[1], True],
+    [TEST_GAMES[2], True],
+    [TEST_GAMES[3], False],
+    [TEST_GAMES[4], False],
+    [TEST_GAMES[5], True]
+])
+def test_is_game_possible(game, possible):
+    bag = {RED: 12, GREEN: 13, BLUE: 14}
+    assert is_game_possible(game, bag) is possible
+
+
+@pytest.mark.parametrize('bag', [
+    {RED: 12, GREEN: 13, BLUE: 14},
+    {RED: 0, GREEN: 0, BLUE: 0},
+    {RED: 4, GREEN: 2, BLUE: 6},
+    {RED: 6, GREEN: 3, BLUE: 2},
+    {RED: 100, GREEN: 100, BLUE: 100},
+])
+def test_game_index_matches_direct_queries(bag):
+    index = GameIndex(TEST_GAMES)
+    possible_games = [game_num for game_num, game in TEST_GAMES.items() if is_game_possible(game, bag)]
+
+    assert index.get_possible_games(bag) == possible_games
+    assert index.count_possible_games(bag) == len(possible_games)
+    assert index.sum_possible_games(bag) == day_2.sum_possible_games(TEST_GAMES, bag)
+    assert index.sum_possible_games_bulk([bag, bag]) == [sum(possible_games)] * 2
@@ -1,5 +1,14 @@
+import functools
 import itertools
-import pytest
+import os
+import re
+import sys
+
+# make the shared aoc package importable when run as a script from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc import instrument
+from aoc.grid import CharGrid
 
 TEST_SCHEMATIC_FILE = 'test.txt'
 SCHEMATIC_FILE = 'schematic.txt'
@@ -69,64 +78,83 @@ class SchematicPartNumberCell(SchematicCell):
             
 
 class Schematic(object):
+    NUMBER_RE = re.compile(r'\d+')
 
     def __init__(self, values):
-        """Create schematic. values is a 2D array of contained items in schematic"""
-        self.cells = [self._parse_line(line, line_num) for line_num, line in enumerate(values)]
-        self.grid = {}
-
-        for line in self.cells: 
-            for cell in line:
+        """
+        Create schematic. values is a 2D array of contained items in schematic, or a CharGrid (as mapped by
+        CharGrid.from_file). The characters are held in a CharGrid, and only numbers get cell objects up front.
+        """
+        self.grid = values if isinstance(values, CharGrid) else CharGrid.from_lines(values)
+        self.part_number_cells = []
+        self.part_number_cells_by_position = {}
+
+        for line_num, line in enumerate(self.grid.lines()):
+            for match in self.NUMBER_RE.finditer(line):
+                cell = SchematicPartNumberCell(
+                    self, x_start=match.start(), x_end=match.end()-1, y=line_num, contents=match.group()
+                )
+                self.part_number_cells.append(cell)
                 for x in range(cell.x_start, cell.x_end+1):
-                    self.grid[(x, cell.y)] = cell
+                    self.part_number_cells_by_position[(x, line_num)] = cell
 
     def __repr__(self):
         return repr(self.cells)
 
+    @functools.cached_property
+    def cells(self):
+        """Every cell of the schematic, line by line, with each number as a single cell."""
+        return [self._parse_line(line, line_num) for line_num, line in enumerate(self.grid.lines())]
+
     def _parse_line(self, line, line_num):
         parsed_line = []
-        found_number = ''
-
-        for i, char in enumerate(line):
-            if char.isdigit():
-                found_number += char
-            else:
-                if found_number:
-                    parsed_line.append(SchematicPartNumberCell(
-                        self, x_start=i-len(found_number), x_end=i-1, y=line_num, contents=found_number
-                    ))
-                    found_number = ''
-                parsed_line.append(SchematicCell(self, x=i, y=line_num, contents=char))
-
-        if found_number:  # if the number is the last thing on the line, check again
-            parsed_line.append(SchematicPartNumberCell(
-                self, x_start=i-len(found_number)+1, x_end=i, y=line_num, contents=found_number
-            ))
+        i = 0
 
+        while i < len(line):
+            cell = self.get_cell(i, line_num)
+            parsed_line.append(cell)
+            i = cell.x_end + 1
 
         return parsed_line
 
     def get_cell(self, x, y):
-        try:
-            return self.grid[(x, y)]
-        except KeyError:
-            return SchematicCell(self, x, y, SchematicCell.EMPTY_VALUE)
+        if (x, y) in self.part_number_cells_by_position:
+            return self.part_number_cells_by_position[(x, y)]
+
+        contents = self.grid.get(x, y)
+        return SchematicCell(self, x, y, SchematicCell.EMPTY_VALUE if contents is None else chr(contents))
 
     def get_all_part_numbers(self):
-        return [int(cell.contents) for cell in itertools.chain(*self.cells) if cell.is_part_number()]
+        return [int(cell.contents) for cell in self.part_number_cells if cell.is_part_number()]
 
     def get_all_gear_ratios(self):
-        adjacent_parts_to_gears = [cell.get_adjacent_part_numbers() for cell in itertools.chain(*self.cells) if cell.is_gear()]
+        gears = [self.get_cell(*self.grid.position(index)) for index in self.grid.find_all('*')]
+        adjacent_parts_to_gears = [cell.get_adjacent_part_numbers() for cell in gears]
         return [int(parts[0]) * int(parts[1]) for parts in adjacent_parts_to_gears if len(parts) == 2]
 
 
 def import_schematic_from_file(filename):
-    with open(filename) as f:
-        return import_schematic(f.readlines())
+    return Schematic(CharGrid.from_file(filename))
 
 def import_schematic(lines):
     return Schematic([[c for c in line if c.isprintable()] for line in lines])
 
+def part_1(filename):
+    with instrument.phase('parse'):
+        schematic = import_schematic_from_file(filename)
+    with instrument.phase('solve'):
+        part_numbers = schematic.get_all_part_numbers()
+    with instrument.phase('aggregate'):
+        return sum(part_numbers)
+
+def part_2(filename):
+    with instrument.phase('parse'):
+        schematic = import_schematic_from_file(filename)
+    with instrument.phase('solve'):
+        gear_ratios = schematic.get_all_gear_ratios()
+    with instrument.phase('aggregate'):
+        return sum(gear_ratios)
+
 def main():
     schematic = import_schematic_from_file(SCHEMATIC_FILE)
     # print(sum(schematic.get_all_part_numbers()))
@@ -186,3 +214,16 @@ def test_import_schematic():
     assert schematic.cells[1][-1].is_symbol() is False
 
 
+
+
+def test_schematic_mapped_from_file(tmp_path):
+    lines = ['467..114..', '...*......', '..35..633.', '......#...', '617*......']
+    schematic_file = tmp_path / 'schematic.txt'
+    schematic_file.write_bytes('\r\n'.join(lines).encode() + b'\r\n')
+
+    schematic = import_schematic_from_file(schematic_file)
+    expected = import_schematic(lines)
+
+    assert schematic.grid.stride == schematic.grid.width + 2
+    assert sorted(schematic.get_all_part_numbers()) == sorted(expected.get_all_part_numbers()) == [35, 467, 617, 633]
+    assert list(schematic.get_all_gear_ratios()) == list(expected.get_all_gear_ratios()) == [16345]
@@ -1,3 +1,12 @@
+import os
+import sys
+
+# make the shared aoc package importable when run as a script from this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aoc import instrument
+from aoc.reader import iter_lines
+
 TEST_INPUT = 'test.txt'
 REAL_INPUT = 'cards.txt'
 
@@ -33,8 +42,19 @@ def import_from_lines(input_lines):
     return [import_draw_and_winners(input_line) for input_line in input_lines]
 
 def import_from_file(filename):
-    with open(filename, 'r') as input_file:
-        return import_from_lines(input_file.readlines())
+    return import_from_lines(iter_lines(filename, decode=True))
+
+def part_1(filename):
+    with instrument.phase('parse'):
+        winners_and_cards = import_from_file(filename)
+    with instrument.phase('solve'):
+        return sum(get_point_value(card, winners) for card, winners in winners_and_cards)
+
+def part_2(filename):
+    with instrument.phase('parse'):
+        winners_and_cards = import_from_file(filename)
+    with instrument.phase('solve'):
+        return get_number_of_cards(winners_and_cards)
 
 def main():
     winners_and_cards = import_from_file(REAL_INPUT)
@@ -0,0 +1,5 @@
+"""
+Shared tooling for running, timing and comparing the day solutions.
+
+Each day lives in its own directory as <day>/<day>.py and exposes part_1(filename) and part_2(filename).
+"""
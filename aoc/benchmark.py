@@ -0,0 +1,136 @@
+"""
+Benchmark every day on generated inputs across size tiers, and compare against a saved baseline.
+
+    python -m aoc.benchmark --tiers small medium --output baseline.json
+    python -m aoc.benchmark --tiers small medium --baseline baseline.json --threshold 1.25
+
+Results are keyed '<day>/<part>/<tier>'. With --baseline, any result whose best wall time is more than threshold
+times the baseline's, and also more than --min-slowdown seconds slower, is reported as a regression, and the exit
+status is 1.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+
+from pathlib import Path
+
+from aoc.days import PARTS
+from aoc.generators import generate
+from aoc.runner import time_part
+
+# generator size per tier for each day
+TIER_SIZES = {
+    1: {'small': 1000, 'medium': 10000, 'large': 100000},
+    2: {'small': 100, 'medium': 1000, 'large': 10000},
+    3: {'small': 40, 'medium': 140, 'large': 400},
+    4: {'small': 300, 'medium': 1000, 'large': 3000},
+    12: {'small': 6, 'medium': 10, 'large': 14},
+    13: {'small': 100, 'medium': 1000, 'large': 10000},
+    14: {'small': 20, 'medium': 50, 'large': 100},
+    15: {'small': 1000, 'medium': 10000, 'large': 100000},
+    16: {'small': 20, 'medium': 110, 'large': 300},
+}
+TIERS = ('small', 'medium', 'large')
+
+DEFAULT_THRESHOLD = 1.25
+
+# sub-millisecond solves jitter by far more than the threshold, so a slowdown must also be at least this many seconds
+DEFAULT_MIN_SLOWDOWN = 0.005
+
+
+def run_benchmarks(days, tiers, repeat=3, seed=0):
+    results = {}
+
+    with tempfile.TemporaryDirectory() as input_dir:
+        for day in days:
+            for tier in tiers:
+                size = TIER_SIZES[day][tier]
+                input_path = Path(input_dir) / '{}-{}.txt'.format(day, tier)
+                input_path.write_text(generate(day, size, seed=seed))
+
+                for part in PARTS:
+                    report = time_part(day, part, input_path, repeat=repeat)
+                    results['{}/{}/{}'.format(day, part, tier)] = {
+                        'size': size,
+                        'answer': report['answer'],
+                        'wall_time': report['wall_time']['min'],
+                        'cpu_time': report['cpu_time']['min'],
+                    }
+
+    return {
+        'python': platform.python_version(),
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def find_regressions(current, baseline, threshold=DEFAULT_THRESHOLD, min_slowdown=DEFAULT_MIN_SLOWDOWN):
+    """
+    Compare best wall times with a baseline. Returns (key, baseline time, current time) for every result slower than
+    threshold times its baseline and by more than min_slowdown seconds. Results missing from either side are skipped.
+    """
+    regressions = []
+    for key, result in sorted(current['results'].items()):
+        baseline_result = baseline['results'].get(key)
+        if not baseline_result:
+            continue
+        baseline_time = baseline_result['wall_time']
+        current_time = result['wall_time']
+        if current_time > baseline_time * threshold and current_time - baseline_time > min_slowdown:
+            regressions.append((key, baseline_time, current_time))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the days on generated inputs.')
+    parser.add_argument('--days', type=int, nargs='+', choices=sorted(TIER_SIZES), default=sorted(TIER_SIZES))
+    parser.add_argument('--tiers', nargs='+', choices=TIERS, default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this file, e.g. to save a new baseline')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--min-slowdown', type=float, default=DEFAULT_MIN_SLOWDOWN, help='seconds')
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.days, args.tiers, repeat=args.repeat, seed=args.seed)
+    results_json = json.dumps(current, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(results_json + '\n')
+    else:
+        print(results_json)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = find_regressions(
+            current, baseline, threshold=args.threshold, min_slowdown=args.min_slowdown
+        )
+        for key, baseline_time, current_time in regressions:
+            print('REGRESSION {}: {:.4f}s -> {:.4f}s'.format(key, baseline_time, current_time), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
+
+
+def test_find_regressions():
+    baseline = {'results': {'16/2/small': {'wall_time': 1.0}, '1/1/small': {'wall_time': 1.0}}}
+    current = {'results': {'16/2/small': {'wall_time': 1.5}, '1/1/small': {'wall_time': 1.1}, '2/1/small': {'wall_time': 9}}}
+
+    assert find_regressions(current, baseline, threshold=1.25) == [('16/2/small', 1.0, 1.5)]
+
+
+def test_find_regressions_ignores_tiny_slowdowns():
+    baseline = {'results': {'1/1/small': {'wall_time': 0.001}, '3/1/small': {'wall_time': 0.004}}}
+    current = {'results': {'1/1/small': {'wall_time': 0.003}, '3/1/small': {'wall_time': 0.012}}}
+
+    assert find_regressions(current, baseline, threshold=1.25) == [('3/1/small', 0.004, 0.012)]
+    assert find_regressions(current, baseline, threshold=1.25, min_slowdown=0) == [
+        ('1/1/small', 0.001, 0.003), ('3/1/small', 0.004, 0.012)
+    ]
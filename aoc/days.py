@@ -0,0 +1,67 @@
+"""
+Locate and lazily import the day modules by path, so they can be run from any working directory.
+"""
+
+import importlib.util
+import sys
+
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DAYS = (1, 2, 3, 4, 12, 13, 14, 15, 16)
+PARTS = (1, 2)
+
+# the real puzzle input for each part of each day, in the day's directory
+REAL_INPUTS = {
+    1: {1: 'input1.txt', 2: 'input2.txt'},
+    2: {1: 'input.txt', 2: 'input.txt'},
+    3: {1: 'schematic.txt', 2: 'schematic.txt'},
+    4: {1: 'cards.txt', 2: 'cards.txt'},
+    12: {1: 'real.txt', 2: 'real.txt'},
+    13: {1: 'map.txt', 2: 'map.txt'},
+    14: {1: 'layout.txt', 2: 'layout.txt'},
+    15: {1: 'input.txt', 2: 'input.txt'},
+    16: {1: 'real.txt', 2: 'real.txt'},
+}
+
+
+def get_day_path(day):
+    return REPO_ROOT / str(day) / '{}.py'.format(day)
+
+
+def get_real_input_path(day, part):
+    return REPO_ROOT / str(day) / REAL_INPUTS[day][part]
+
+
+def load_day(day):
+    """
+    Import the module for a day. The module is registered in sys.modules as day<N>, so repeated loads return the same
+    module. Functions defined in it can only be pickled to workers that fork from this process: pool workers that
+    may be spawned belong in aoc.workers.
+    """
+    module_name = 'day{}'.format(day)
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    path = get_day_path(day)
+    if not path.exists():
+        raise ValueError('No solution for day {} (expected {})'.format(day, path))
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+
+    return module
+
+
+def get_part(day, part):
+    """The part_1 / part_2 solver function for a day."""
+    if part not in PARTS:
+        raise ValueError('Part must be one of {}, not {}'.format(PARTS, part))
+    return getattr(load_day(day), 'part_{}'.format(part))
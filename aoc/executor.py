@@ -0,0 +1,224 @@
+"""
+Run every day's parts concurrently, with an on-disk cache of answers.
+
+    python -m aoc.executor --workers 4 --timeout 60
+
+Each (day, part, input) runs in its own worker process, at most --workers at once, and a worker still running after
+--timeout seconds is terminated, so one pathological input cannot stall the batch. Answers are cached in .aoc_cache
+keyed by the day, part, SHA-256 of the input and the solver version (a hash of the day module's source and of every
+module in the aoc package, which the days share), so unchanged inputs return instantly and any code change re-solves.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from multiprocessing.connection import wait
+from pathlib import Path
+
+from aoc.days import DAYS, PARTS, REPO_ROOT, get_day_path, get_part, get_real_input_path
+
+DEFAULT_CACHE_DIR = REPO_ROOT / '.aoc_cache'
+DEFAULT_TIMEOUT = 60
+
+AOC_PACKAGE_PATH = Path(__file__).resolve().parent
+
+STATUS_OK = 'ok'
+STATUS_CACHED = 'cached'
+STATUS_TIMEOUT = 'timeout'
+STATUS_ERROR = 'error'
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _solver_version(day):
+    """A hash of the day module's source, and of the aoc package's modules it may use."""
+    digest = hashlib.sha256()
+    for path in [get_day_path(day), *sorted(AOC_PACKAGE_PATH.glob('*.py'))]:
+        digest.update(_file_sha256(path).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Answers stored as one small JSON file per (day, part, input hash, solver version) key."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def key(day, part, input_path):
+        return '{}-{}-{}-{}'.format(day, part, _file_sha256(input_path), _solver_version(day))
+
+    def get(self, key):
+        """The cached answer, or None on a miss. A corrupt entry counts as a miss, and is rewritten by the next put."""
+        try:
+            return json.loads((self.cache_dir / '{}.json'.format(key)).read_text())['answer']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+            return None
+
+    def put(self, key, answer):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # each writer gets its own temporary file, so concurrent puts of one key cannot interleave their writes
+        with tempfile.NamedTemporaryFile('w', dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+            f.write(json.dumps({'answer': answer}))
+        try:
+            os.replace(f.name, self.cache_dir / '{}.json'.format(key))
+        except OSError:
+            os.remove(f.name)
+            raise
+
+
+def _solve_in_worker(day, part, input_path, connection):
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            answer = get_part(day, part)(input_path)
+        connection.send((STATUS_OK, answer))
+    except Exception as e:
+        connection.send((STATUS_ERROR, '{}: {}'.format(type(e).__name__, e)))
+    finally:
+        connection.close()
+
+
+def run_all(jobs, workers=None, timeout=DEFAULT_TIMEOUT, cache=None):
+    """
+    Solve each (day, part, input path) job, returning a result dict per job in the same order.
+    Cached answers are returned without starting a worker.
+    """
+    workers = workers or os.cpu_count()
+    context = multiprocessing.get_context()
+    results = [None] * len(jobs)
+    pending = []
+
+    for job_num, (day, part, input_path) in enumerate(jobs):
+        result = {'day': day, 'part': part, 'input': str(input_path)}
+        cache_key = cache.key(day, part, input_path) if cache else None
+        answer = cache.get(cache_key) if cache else None
+        if answer is not None:
+            results[job_num] = dict(result, status=STATUS_CACHED, answer=answer, wall_time=0.0)
+        else:
+            pending.append((job_num, result, cache_key))
+
+    running = {}  # receiving connection -> (process, job_num, result, cache_key, start time)
+    while pending or running:
+        while pending and len(running) < workers:
+            job_num, result, cache_key = pending.pop(0)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_solve_in_worker, args=(result['day'], result['part'], result['input'], sender), daemon=True
+            )
+            process.start()
+            sender.close()
+            running[receiver] = (process, job_num, result, cache_key, time.perf_counter())
+
+        for receiver in wait(list(running), timeout=0.05):
+            process, job_num, result, cache_key, start = running.pop(receiver)
+            try:
+                status, value = receiver.recv()
+            except EOFError:
+                status, value = STATUS_ERROR, None
+            process.join()
+            if value is None and status == STATUS_ERROR:
+                value = 'worker exited with code {}'.format(process.exitcode)
+
+            result.update(status=status, wall_time=time.perf_counter() - start)
+            result['answer' if status == STATUS_OK else 'error'] = value
+            if status == STATUS_OK and cache:
+                cache.put(cache_key, value)
+            results[job_num] = result
+
+        now = time.perf_counter()
+        for receiver, (process, job_num, result, cache_key, start) in list(running.items()):
+            if now - start > timeout:
+                process.terminate()
+                process.join()
+                del running[receiver]
+                results[job_num] = dict(result, status=STATUS_TIMEOUT, wall_time=now - start)
+
+    return results
+
+
+def get_real_input_jobs(days=DAYS, parts=PARTS):
+    return [(day, part, get_real_input_path(day, part)) for day in days for part in parts]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve every day concurrently, caching answers.')
+    parser.add_argument('--days', type=int, nargs='+', choices=DAYS, default=DAYS)
+    parser.add_argument('--parts', type=int, nargs='+', choices=PARTS, default=PARTS)
+    parser.add_argument('--workers', type=int, default=None, help='maximum concurrent workers (default: CPU count)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='per-job timeout in seconds')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    results = run_all(get_real_input_jobs(args.days, args.parts), args.workers, args.timeout, cache)
+    print(json.dumps(results, indent=2))
+
+    if any(result['status'] in (STATUS_TIMEOUT, STATUS_ERROR) for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
+
+
+def test_run_all_caches_answers(tmp_path):
+    cache = ResultCache(tmp_path)
+    jobs = [(16, 1, get_day_path(16).parent / 'test.txt'), (14, 2, get_day_path(14).parent / 'test.txt')]
+
+    first = run_all(jobs, workers=2, cache=cache)
+    second = run_all(jobs, workers=2, cache=cache)
+
+    assert [(result['status'], result['answer']) for result in first] == [(STATUS_OK, 46), (STATUS_OK, 64)]
+    assert [(result['status'], result['answer']) for result in second] == [(STATUS_CACHED, 46), (STATUS_CACHED, 64)]
+
+
+def test_cache_treats_corrupt_entries_as_misses(tmp_path):
+    cache = ResultCache(tmp_path)
+    (tmp_path / 'half.json').write_text('{"ans')
+    (tmp_path / 'other.json').write_text('[]')
+
+    assert cache.get('half') is None
+    assert cache.get('other') is None
+
+    cache.put('half', 46)
+    assert cache.get('half') == 46
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['half.json', 'other.json']
+
+
+def test_run_all_times_out(tmp_path):
+    from aoc.generators import generate
+
+    # part 1 tries every fill of each record's unknowns, 2 ** 24 of them here
+    input_path = tmp_path / 'springs.txt'
+    input_path.write_text(generate(12, 24, seed=0))
+    results = run_all([(12, 1, input_path)], timeout=0.5)
+
+    assert results[0]['status'] == STATUS_TIMEOUT
+
+
+def test_cache_key_covers_aoc_package(tmp_path, monkeypatch):
+    import shutil
+
+    package_path = tmp_path / 'aoc'
+    shutil.copytree(AOC_PACKAGE_PATH, package_path, ignore=shutil.ignore_patterns('__pycache__'))
+    monkeypatch.setitem(globals(), 'AOC_PACKAGE_PATH', package_path)
+    input_path = get_day_path(16).parent / 'test.txt'
+    key = ResultCache.key(16, 1, input_path)
+
+    with open(package_path / 'grid.py', 'a') as f:
+        f.write('\n# changed\n')
+    assert ResultCache.key(16, 1, input_path) != key
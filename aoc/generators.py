@@ -0,0 +1,212 @@
+"""
+Seeded generators of valid puzzle inputs at configurable sizes, for benchmarking beyond the supplied inputs.
+
+    python -m aoc.generators 16 200 --seed 1 > big_grid.txt
+
+Every generator takes a size and a random.Random, and returns the input text. What size means depends on the day
+(lines, games, cards, maps or steps, unknown springs per record, or the side length of a square grid), see GENERATORS.
+"""
+
+import argparse
+import random
+import string
+import sys
+
+NUMBER_WORDS = ('one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine')
+SCHEMATIC_SYMBOLS = '*#+$/=%@&-'
+
+
+def generate_calibrations(size, rng):
+    """Day 1: size lines of letters with digits and number words mixed in. Every line has at least one digit."""
+    lines = []
+    for _ in range(size):
+        parts = [str(rng.randint(1, 9))]
+        for _ in range(rng.randint(1, 6)):
+            choice = rng.random()
+            if choice < 0.3:
+                parts.append(str(rng.randint(1, 9)))
+            elif choice < 0.6:
+                parts.append(rng.choice(NUMBER_WORDS))
+            else:
+                parts.append(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 8))))
+        rng.shuffle(parts)
+        lines.append(''.join(parts))
+    return '\n'.join(lines) + '\n'
+
+
+def generate_games(size, rng):
+    """Day 2: size games of one to six draws."""
+    lines = []
+    for game_num in range(1, size + 1):
+        draws = []
+        for _ in range(rng.randint(1, 6)):
+            colours = rng.sample(('red', 'green', 'blue'), rng.randint(1, 3))
+            draws.append(', '.join('{} {}'.format(rng.randint(1, 20), colour) for colour in colours))
+        lines.append('Game {}: {}'.format(game_num, '; '.join(draws)))
+    return '\n'.join(lines) + '\n'
+
+
+def generate_schematic(size, rng):
+    """Day 3: a size x size schematic of numbers and symbols on a background of dots."""
+    rows = []
+    for _ in range(size):
+        row = ''
+        while len(row) < size:
+            choice = rng.random()
+            if choice < 0.15:
+                row += str(rng.randint(1, 999)) + '.'
+            elif choice < 0.25:
+                row += rng.choice(SCHEMATIC_SYMBOLS)
+            else:
+                row += '.'
+        rows.append(row[:size])
+    return '\n'.join(rows) + '\n'
+
+
+def generate_cards(size, rng):
+    """
+    Day 4: size cards of 10 winning numbers and 25 numbers held. Matches average under one per card (otherwise the
+    number of copies grows exponentially) and never run past the last card.
+    """
+    lines = []
+    for card_num in range(1, size + 1):
+        numbers = rng.sample(range(1, 100), 35)
+        winners, held = numbers[:10], numbers[10:]
+        num_matches = 0 if rng.random() < 0.7 else rng.randint(1, 4)
+        num_matches = min(num_matches, size - card_num)
+        held[:num_matches] = winners[:num_matches]
+        rng.shuffle(held)
+        lines.append('Card {}: {} | {}'.format(
+            card_num, ' '.join('{:2}'.format(n) for n in winners), ' '.join('{:2}'.format(n) for n in held)
+        ))
+    return '\n'.join(lines) + '\n'
+
+
+def generate_spring_records(size, rng, num_records=50):
+    """
+    Day 12: num_records records, each a random arrangement of springs with size of them replaced by '?'. The brute
+    force solver tries 2 ** size fills per record, so size here is the number of unknowns rather than of records.
+    """
+    lines = []
+    for _ in range(num_records):
+        groups = [rng.randint(1, 4) for _ in range(rng.randint(2, 5))]
+        springs = '.' * rng.randint(0, 2)
+        springs += ''.join('#' * group + '.' * rng.randint(1, 3) for group in groups)
+        springs = list(springs)
+        for i in rng.sample(range(len(springs)), min(size, len(springs))):
+            springs[i] = '?'
+        lines.append('{} {}'.format(''.join(springs), ','.join(map(str, groups))))
+    return '\n'.join(lines) + '\n'
+
+
+def _generate_reflected_rows(rng, height, width):
+    """Random rows reflected about a random point. Returns the rows, and the range of rows the reflection covers."""
+    rows = [''.join(rng.choices('.#', k=width)) for _ in range(height)]
+    reflection_point = rng.randint(1, height - 1)
+    reflected = min(reflection_point, height - reflection_point)
+    for i in range(reflected):
+        rows[reflection_point + i] = rows[reflection_point - 1 - i]
+    return rows, range(reflection_point - reflected, reflection_point + reflected)
+
+
+def generate_mirror_maps(size, rng):
+    """
+    Day 13: size maps, each with a reflection, horizontal or vertical at random. Odd maps carry a smudge in the
+    reflected part, so part 1 scores the even maps and part 2 the odd ones.
+    """
+    maps = []
+    for map_num in range(size):
+        height, width = rng.randint(5, 17), rng.randint(5, 17)
+        # the smudge goes inside the mirrored band, so that fixing it restores the reflection
+        if rng.random() < 0.5:
+            reflected_rows, band = _generate_reflected_rows(rng, height, width)
+            rows = [list(row) for row in reflected_rows]
+            smudge_y, smudge_x = rng.choice(band), rng.randrange(width)
+        else:
+            reflected_columns, band = _generate_reflected_rows(rng, width, height)
+            rows = [list(row) for row in zip(*reflected_columns)]
+            smudge_y, smudge_x = rng.randrange(height), rng.choice(band)
+
+        if map_num % 2:
+            rows[smudge_y][smudge_x] = '#' if rows[smudge_y][smudge_x] == '.' else '.'
+
+        maps.append('\n'.join(''.join(row) for row in rows))
+    return '\n\n'.join(maps) + '\n'
+
+
+def generate_rock_layout(size, rng):
+    """Day 14: a size x size layout of round rocks and cube rocks."""
+    return '\n'.join(''.join(rng.choices('O#.', weights=(20, 15, 65), k=size)) for _ in range(size)) + '\n'
+
+
+def generate_initialization_sequence(size, rng):
+    """Day 15: size comma-separated steps over a pool of labels, so lenses get replaced and removed."""
+    labels = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 6))) for _ in range(max(size // 10, 1))]
+    steps = []
+    for _ in range(size):
+        label = rng.choice(labels)
+        steps.append(label + '-' if rng.random() < 0.3 else '{}={}'.format(label, rng.randint(1, 9)))
+    return ','.join(steps)
+
+
+def generate_mirror_grid(size, rng):
+    """Day 16: a size x size grid of empty space with about one tile in ten a mirror or splitter."""
+    rows = (''.join(rng.choices('.|-\\/', weights=(90, 2.5, 2.5, 2.5, 2.5), k=size)) for _ in range(size))
+    return '\n'.join(rows) + '\n'
+
+
+GENERATORS = {
+    1: generate_calibrations,
+    2: generate_games,
+    3: generate_schematic,
+    4: generate_cards,
+    12: generate_spring_records,
+    13: generate_mirror_maps,
+    14: generate_rock_layout,
+    15: generate_initialization_sequence,
+    16: generate_mirror_grid,
+}
+
+
+def generate(day, size, seed=0):
+    """Generate the input text for a day. The same (day, size, seed) always gives the same text."""
+    return GENERATORS[day](size, random.Random('{}-{}-{}'.format(day, size, seed)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic puzzle input.')
+    parser.add_argument('day', type=int, choices=sorted(GENERATORS))
+    parser.add_argument('size', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sys.stdout.write(generate(args.day, args.size, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
+
+
+def test_generated_inputs_solve(tmp_path):
+    from aoc.days import get_part
+
+    for day in GENERATORS:
+        input_path = tmp_path / '{}.txt'.format(day)
+        input_path.write_text(generate(day, 10, seed=1))
+        for part in (1, 2):
+            assert isinstance(get_part(day, part)(str(input_path)), int)
+
+
+def test_generate_is_seeded():
+    assert generate(16, 20, seed=3) == generate(16, 20, seed=3)
+    assert generate(16, 20, seed=3) != generate(16, 20, seed=4)
+
+
+def test_mirror_map_smudges_leave_a_reflection():
+    from aoc.days import load_day
+
+    day_13 = load_day(13)
+    maps = day_13.import_maps(generate(13, 200, seed=0).splitlines())
+
+    assert all(day_13.find_symmetry(map_, smudge_tolerance=0) for map_ in maps[0::2])
+    assert all(day_13.find_symmetry(map_, smudge_tolerance=1) for map_ in maps[1::2])
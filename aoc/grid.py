@@ -0,0 +1,210 @@
+"""
+A compact grid of single-byte characters, shared by the grid-based days (3, 14 and 16).
+
+The whole grid is one row-major buffer, instead of a dict with an object per (x, y) cell.
+"""
+
+import mmap
+
+ORTHOGONAL_OFFSETS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+DIAGONAL_OFFSETS = ORTHOGONAL_OFFSETS + ((-1, -1), (1, -1), (1, 1), (-1, 1))
+
+
+def _as_byte(value):
+    return ord(value) if isinstance(value, str) else value
+
+
+class CharGrid:
+    """
+    A fixed width x height grid of characters. Cell (x, y) is data[y * stride + x] and is read and written as an int
+    byte value. stride is normally the width, but a grid mapped straight from a file keeps its line endings, so there
+    stride is width + 1 (or + 2 for CRLF files).
+    """
+
+    def __init__(self, data, width, height, stride=None):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.stride = stride or width
+
+    @classmethod
+    def from_lines(cls, lines):
+        """Build a grid from lines of text (or of characters). Line endings and blank lines are dropped."""
+        rows = [''.join(line).strip() for line in lines]
+        rows = [row for row in rows if row]
+        if any(len(row) != len(rows[0]) for row in rows):
+            raise ValueError('Grid rows must all be the same length')
+
+        return cls(bytearray(''.join(rows).encode()), len(rows[0]) if rows else 0, len(rows))
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+        Map a file into a grid without copying it. The mapping is copy-on-write, so the grid can still be edited
+        without touching the file.
+        Like from_lines, raises ValueError unless the rows are all the same (non-zero) length.
+        """
+        with open(filename, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            except ValueError:  # empty file
+                return cls(bytearray(), 0, 0)
+
+        end = len(data)
+        while end and data[end-1] in b'\r\n':
+            end -= 1
+        if not end:  # only blank lines
+            return cls(bytearray(), 0, 0)
+
+        width = data.find(b'\n')
+        if width < 0:
+            width = len(data)
+        stride = width + 1
+        if width and data[width-1] == ord('\r'):
+            width -= 1
+        height = -(-end // stride)
+
+        # every row must be width cells and then the first row's line ending, with no other newlines in between
+        line_ending = data[width:stride]
+        if (
+            not width
+            or end - (height - 1) * stride != width
+            or any(data.find(b'\n', y * stride, y * stride + width) >= 0 for y in range(height))
+            or any(data[y * stride + width:(y + 1) * stride] != line_ending for y in range(height - 1))
+        ):
+            raise ValueError('Grid rows must all be the same length')
+
+        return cls(data, width, height, stride)
+
+    def __repr__(self):
+        return '<CharGrid {}x{}>'.format(self.width, self.height)
+
+    def __str__(self):
+        return '\n'.join(self.lines())
+
+    def __len__(self):
+        return self.width * self.height
+
+    def __eq__(self, other):
+        return isinstance(other, CharGrid) and self.lines() == other.lines()
+
+    def index(self, x, y):
+        return y * self.stride + x
+
+    def position(self, index):
+        return index % self.stride, index // self.stride
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def __getitem__(self, position):
+        x, y = position
+        if not self.in_bounds(x, y):
+            raise IndexError('{} is outside the grid'.format(position))
+        return self.data[y * self.stride + x]
+
+    def __setitem__(self, position, value):
+        x, y = position
+        if not self.in_bounds(x, y):
+            raise IndexError('{} is outside the grid'.format(position))
+        self.data[y * self.stride + x] = _as_byte(value)
+
+    def get(self, x, y, default=None):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.data[y * self.stride + x]
+        return default
+
+    def row(self, y):
+        """A view of row y. Nothing is copied."""
+        start = y * self.stride
+        return memoryview(self.data)[start:start + self.width]
+
+    def column(self, x):
+        """A strided view of column x. Nothing is copied."""
+        return memoryview(self.data)[x:(self.height - 1) * self.stride + x + 1:self.stride]
+
+    def rows(self):
+        return (self.row(y) for y in range(self.height))
+
+    def lines(self):
+        return [bytes(row).decode() for row in self.rows()]
+
+    def neighbours(self, x, y, diagonal=False):
+        """The in-bounds (x, y) positions around a cell."""
+        for dx, dy in DIAGONAL_OFFSETS if diagonal else ORTHOGONAL_OFFSETS:
+            nx = x + dx
+            ny = y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                yield nx, ny
+
+    def neighbour_indexes(self, index, diagonal=False):
+        """As neighbours, but as flat indexes into data."""
+        x = index % self.stride
+        y = index // self.stride
+        for dx, dy in DIAGONAL_OFFSETS if diagonal else ORTHOGONAL_OFFSETS:
+            if 0 <= x + dx < self.width and 0 <= y + dy < self.height:
+                yield index + dy * self.stride + dx
+
+    def find_all(self, char):
+        """Flat indexes of every cell holding char, in row-major order."""
+        char = bytes((_as_byte(char),))
+        index = self.data.find(char)
+        while index >= 0:
+            if index % self.stride < self.width:
+                yield index
+            index = self.data.find(char, index + 1)
+
+    def count(self, char):
+        return sum(1 for _ in self.find_all(char))
+
+    def copy(self):
+        """A compact (stride == width) copy of the grid."""
+        return CharGrid(bytearray(b''.join(self.rows())), self.width, self.height)
+
+
+def test_from_lines():
+    grid = CharGrid.from_lines(['#..\n', '.O.\n', '..#\n', '\n'])
+
+    assert (grid.width, grid.height) == (3, 3)
+    assert grid[1, 1] == ord('O')
+    assert grid.get(3, 0) is None
+    assert bytes(grid.row(1)) == b'.O.'
+    assert bytes(grid.column(2)) == b'..#'
+    assert str(grid) == '#..\n.O.\n..#'
+
+
+def test_from_file_is_mapped_copy_on_write(tmp_path):
+    path = tmp_path / 'grid.txt'
+    path.write_text('#..\n.O.\n..#\n')
+    grid = CharGrid.from_file(path)
+
+    assert (grid.width, grid.height, grid.stride) == (3, 3, 4)
+    assert bytes(grid.column(0)) == b'#..'
+    assert list(grid.find_all('#')) == [grid.index(0, 0), grid.index(2, 2)]
+
+    grid[0, 0] = '.'
+    assert grid.count('#') == 1
+    assert path.read_text() == '#..\n.O.\n..#\n'
+    assert grid.copy() == grid
+
+
+def test_from_file_checks_rows(tmp_path):
+    import pytest
+
+    path = tmp_path / 'grid.txt'
+    for text in ('ab\r\ncd', 'ab\ncd\n\n', '\n\n'):
+        path.write_bytes(text.encode())
+        assert CharGrid.from_file(path) == CharGrid.from_lines(text.splitlines())
+
+    for text in ('ab\nc\nde\n', 'abc\n\nxy\n', '\nab\ncd\n', 'ab\ncd\nefg\n', 'ab\r\ncd\nef\n'):
+        path.write_bytes(text.encode())
+        with pytest.raises(ValueError):
+            CharGrid.from_file(path)
+
+
+def test_neighbours():
+    grid = CharGrid.from_lines(['...', '...'])
+
+    assert list(grid.neighbours(0, 0)) == [(1, 0), (0, 1)]
+    assert sorted(grid.neighbours(1, 0, diagonal=True)) == [(0, 0), (0, 1), (1, 1), (2, 0), (2, 1)]
+    assert list(grid.neighbour_indexes(grid.index(0, 0))) == [1, 3]
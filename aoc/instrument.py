@@ -0,0 +1,190 @@
+"""
+Opt-in counters, phase timers and cProfile capture for the days' hot paths.
+
+With memory set, tracemalloc also records the peak traced memory of each phase and the allocation sites that grew
+the most during it.
+
+Instrumentation is off by default. While off, count() returns straight away and phase() hands back a shared no-op
+context manager, and hot loops check `instrument.enabled` once per call rather than once per step.
+
+    instrument.enable(profile=True)
+    ... solve ...
+    print(json.dumps(instrument.report()))
+"""
+
+import contextlib
+import time
+
+from collections import Counter
+
+enabled = False
+counters = Counter()
+phases = {}
+
+TOP_ALLOCATION_SITES = 5
+
+_profiler = None
+_tracemalloc = None
+_peak_memory = 0
+_NO_PHASE = contextlib.nullcontext()
+
+
+def enable(profile=False, memory=False):
+    """
+    Start collecting, from empty. With profile set, the whole run is also captured with cProfile, and with memory set
+    it is traced with tracemalloc.
+    """
+    global enabled, _profiler, _tracemalloc
+    reset()
+    enabled = True
+    if profile:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if memory:
+        import tracemalloc
+        _tracemalloc = tracemalloc
+        _tracemalloc.start()
+
+
+def disable():
+    global enabled
+    enabled = False
+    if _profiler is not None:
+        _profiler.disable()
+    if _tracemalloc is not None and _tracemalloc.is_tracing():
+        _record_peak_memory()
+        _tracemalloc.stop()
+
+
+def reset():
+    global _profiler, _tracemalloc, _peak_memory
+    counters.clear()
+    phases.clear()
+    _profiler = None
+    _tracemalloc = None
+    _peak_memory = 0
+
+
+def _record_peak_memory():
+    global _peak_memory
+    _peak_memory = max(_peak_memory, _tracemalloc.get_traced_memory()[1])
+
+
+def _take_snapshot():
+    return _tracemalloc.take_snapshot().filter_traces((_tracemalloc.Filter(False, _tracemalloc.__file__),))
+
+
+def _top_allocation_sites(snapshot, start_snapshot):
+    return [
+        {
+            'site': '{}:{}'.format(stat.traceback[0].filename, stat.traceback[0].lineno),
+            'size': stat.size_diff,
+            'count': stat.count_diff,
+        }
+        for stat in snapshot.compare_to(start_snapshot, 'lineno')[:TOP_ALLOCATION_SITES]
+        if stat.size_diff > 0
+    ]
+
+
+def count(name, amount=1):
+    if enabled:
+        counters[name] += amount
+
+
+@contextlib.contextmanager
+def _timed_phase(name):
+    tracing_memory = _tracemalloc is not None and _tracemalloc.is_tracing()
+    if tracing_memory:
+        _record_peak_memory()
+        _tracemalloc.reset_peak()
+        start_snapshot = _take_snapshot()
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase_times = phases.setdefault(name, {'calls': 0, 'wall_time': 0.0})
+        phase_times['calls'] += 1
+        phase_times['wall_time'] += time.perf_counter() - start
+
+        if tracing_memory:
+            phase_peak = _tracemalloc.get_traced_memory()[1]
+            phase_times['peak_memory'] = max(phase_times.get('peak_memory', 0), phase_peak)
+            phase_times['top_allocations'] = _top_allocation_sites(_take_snapshot(), start_snapshot)
+            _record_peak_memory()
+
+
+def phase(name):
+    """Time a block of code as one phase of the run, e.g. 'parse', 'solve' or 'aggregate'."""
+    return _timed_phase(name) if enabled else _NO_PHASE
+
+
+def report(top=20):
+    """The collected counters and phase timings, plus the top functions by cumulative time if profiling."""
+    result = {
+        'counters': dict(sorted(counters.items())),
+        'phases': {name: dict(phase_times) for name, phase_times in phases.items()},
+    }
+
+    if _tracemalloc is not None:
+        if _tracemalloc.is_tracing():
+            _record_peak_memory()
+        result['peak_memory'] = _peak_memory
+
+    if _profiler is not None:
+        import pstats
+        stats = pstats.Stats(_profiler).stats
+        by_cumulative_time = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+        result['profile'] = [
+            {
+                'function': '{}:{}({})'.format(*function),
+                'calls': num_calls,
+                'total_time': total_time,
+                'cumulative_time': cumulative_time,
+            }
+            for function, (_, num_calls, total_time, cumulative_time, _) in by_cumulative_time
+        ]
+
+    return result
+
+
+def test_disabled_by_default_records_nothing():
+    reset()
+    count('steps')
+    with phase('solve'):
+        pass
+
+    assert report() == {'counters': {}, 'phases': {}}
+
+
+def test_enabled_report():
+    enable(profile=True)
+    try:
+        count('steps', 3)
+        count('steps')
+        with phase('parse'):
+            sorted(range(100))
+    finally:
+        disable()
+
+    result = report()
+    assert result['counters'] == {'steps': 4}
+    assert result['phases']['parse']['calls'] == 1
+    assert any('sorted' in entry['function'] for entry in result['profile'])
+    reset()
+
+
+def test_memory_report():
+    enable(memory=True)
+    try:
+        with phase('parse'):
+            kept = [str(n) for n in range(10000)]
+    finally:
+        disable()
+
+    result = report()
+    assert result['phases']['parse']['peak_memory'] >= result['phases']['parse']['top_allocations'][0]['size'] > 0
+    assert result['peak_memory'] >= result['phases']['parse']['peak_memory']
+    assert __file__ in result['phases']['parse']['top_allocations'][0]['site']
+    reset()
@@ -0,0 +1,114 @@
+"""
+Check the memory cost of the grid days' representations, in bytes per grid cell.
+
+    python -m aoc.memory --size 200
+
+Each grid day's structure is built from a generated size x size input while tracemalloc is tracing, and the bytes it
+still holds once built are divided by the number of cells. Any day over its budget in BYTES_PER_CELL_BUDGETS is
+reported, and the exit status is 1. For peak memory and allocation sites of a whole solve, use
+`python -m aoc.runner <day> <part> <input> --memory`.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+
+from aoc.days import load_day
+from aoc.generators import generate
+
+DEFAULT_SIZE = 200
+
+# retained bytes per cell of each grid day's parsed structure, with some headroom over the measured cost
+BYTES_PER_CELL_BUDGETS = {
+    3: 64,
+    14: 2,
+    16: 40,
+}
+
+
+def _build_schematic(module, lines):
+    return module.import_schematic(lines)
+
+
+def _build_rock_layout(module, lines):
+    return module.RockLayout(lines)
+
+
+def _build_beam_grid(module, lines):
+    return module.Grid(lines)
+
+
+STRUCTURE_BUILDERS = {
+    3: _build_schematic,
+    14: _build_rock_layout,
+    16: _build_beam_grid,
+}
+
+
+def measure_bytes_per_cell(day, size=DEFAULT_SIZE, seed=0):
+    """The bytes held by a day's structure built from a generated input, per grid cell, and its peak while building."""
+    module = load_day(day)
+    lines = generate(day, size, seed=seed).splitlines()
+    cells = sum(len(line) for line in lines)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        structure = STRUCTURE_BUILDERS[day](module, lines)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del structure
+
+    return {
+        'cells': cells,
+        'retained': retained - start,
+        'peak': peak - start,
+        'bytes_per_cell': (retained - start) / cells,
+    }
+
+
+def check_bytes_per_cell(days=tuple(BYTES_PER_CELL_BUDGETS), size=DEFAULT_SIZE, seed=0):
+    """Returns the measurements for each day, and a list of the days over budget."""
+    measurements = {}
+    problems = []
+
+    for day in days:
+        measurements[day] = measure_bytes_per_cell(day, size, seed)
+        if measurements[day]['bytes_per_cell'] > BYTES_PER_CELL_BUDGETS[day]:
+            problems.append('day {} holds {:.1f} bytes per cell, over the {} byte budget'.format(
+                day, measurements[day]['bytes_per_cell'], BYTES_PER_CELL_BUDGETS[day]
+            ))
+
+    return measurements, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the bytes held per grid cell by the grid days.')
+    parser.add_argument('--days', type=int, nargs='+', choices=sorted(BYTES_PER_CELL_BUDGETS),
+                        default=sorted(BYTES_PER_CELL_BUDGETS))
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help='generated grid width and height')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    measurements, problems = check_bytes_per_cell(args.days, args.size, args.seed)
+    print(json.dumps(measurements, indent=2))
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
+
+
+def test_bytes_per_cell_within_budgets():
+    measurements, problems = check_bytes_per_cell(size=60)
+
+    assert set(measurements) == set(BYTES_PER_CELL_BUDGETS)
+    assert problems == []
@@ -0,0 +1,83 @@
+"""
+Read puzzle input line by line from a memory-mapped file, instead of holding the whole file as a list of strings.
+
+Lines are yielded as zero-copy memoryviews into the mapping (without their line endings), or as str with decode=True.
+iter_blocks splits a file into line-aligned byte ranges, so parallel consumers can each read just their own range.
+"""
+
+import mmap
+import os
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+def _map_file(filename):
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def iter_lines(filename, decode=False, start=0, stop=None):
+    """
+    Yield the lines of a file, or of the byte range [start, stop) of it, which should fall on line boundaries (see
+    iter_blocks). Each line is a memoryview into the mapped file, or a str if decode is set.
+    """
+    data = _map_file(filename)
+    if data is None:
+        return
+
+    view = memoryview(data)
+    stop = len(data) if stop is None else stop
+
+    while start < stop:
+        end = data.find(b'\n', start, stop)
+        if end < 0:
+            end = stop
+        line_end = end - 1 if end > start and data[end-1] == ord('\r') else end
+
+        yield str(view[start:line_end], 'utf-8') if decode else view[start:line_end]
+        start = end + 1
+
+
+def iter_blocks(filename, block_size=DEFAULT_BLOCK_SIZE):
+    """Split a file into (start, stop) byte ranges of roughly block_size, each ending just after a newline."""
+    data = _map_file(filename)
+    if data is None:
+        return
+
+    with data:
+        start = 0
+        while start < len(data):
+            end = data.find(b'\n', min(start + block_size, len(data)) - 1)
+            stop = len(data) if end < 0 else end + 1
+            yield start, stop
+            start = stop
+
+
+def test_iter_lines(tmp_path):
+    path = tmp_path / 'input.txt'
+    path.write_bytes(b'abc\r\n\nde\nf')
+
+    assert [bytes(line) for line in iter_lines(path)] == [b'abc', b'', b'de', b'f']
+    assert list(iter_lines(path, decode=True)) == ['abc', '', 'de', 'f']
+
+
+def test_iter_blocks_cover_file_on_line_boundaries(tmp_path):
+    path = tmp_path / 'input.txt'
+    lines = ['line {}'.format(i) for i in range(100)]
+    path.write_text('\n'.join(lines) + '\n')
+
+    blocks = list(iter_blocks(path, block_size=64))
+
+    assert len(blocks) > 1
+    assert blocks[0][0] == 0 and blocks[-1][1] == path.stat().st_size
+    assert [line for start, stop in blocks for line in iter_lines(path, True, start, stop)] == lines
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'input.txt'
+    path.write_text('')
+
+    assert list(iter_lines(path)) == []
+    assert list(iter_blocks(path)) == []
@@ -0,0 +1,153 @@
+"""
+Run one part of one day against an input file, and report the answer with timings as JSON.
+
+    python -m aoc.runner 16 2 16/real.txt --repeat 5
+
+Anything the solver prints goes to stderr, so stdout is only the JSON report.
+"""
+
+import argparse
+import contextlib
+import json
+import resource
+import statistics
+import sys
+import time
+
+from aoc import instrument
+from aoc.days import DAYS, PARTS, get_part
+
+
+def _summarise(samples):
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.mean(samples),
+        'samples': samples,
+    }
+
+
+def time_part(day, part, input_path, repeat=1, instrumented=False, profile=False, memory=False):
+    """
+    Solve the part repeat times, returning a report of the answer, wall-clock and CPU times and peak memory.
+    With instrumented (or profile) set, the report also holds the instrumentation totals over all the runs. With
+    memory set, the runs are traced with tracemalloc, which slows them down, and the report holds the peak traced
+    memory and top allocation sites, per phase and for the whole day.
+    """
+    solve = get_part(day, part)
+    wall_times = []
+    cpu_times = []
+    answers = set()
+
+    if instrumented or profile or memory:
+        instrument.enable(profile=profile, memory=memory)
+
+    try:
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(sys.stderr):
+                wall_start = time.perf_counter()
+                cpu_start = time.process_time()
+                answer = solve(str(input_path))
+                cpu_times.append(time.process_time() - cpu_start)
+                wall_times.append(time.perf_counter() - wall_start)
+            answers.add(answer)
+    finally:
+        # a failing solve must not leave instrumentation (or tracemalloc and the profiler) on for later callers
+        if instrument.enabled:
+            instrument.disable()
+
+    if len(answers) != 1:
+        raise RuntimeError('Day {} part {} gave different answers across runs: {}'.format(day, part, answers))
+
+    report = {
+        'day': day,
+        'part': part,
+        'input': str(input_path),
+        'answer': answer,
+        'repeat': repeat,
+        'wall_time': _summarise(wall_times),
+        'cpu_time': _summarise(cpu_times),
+        # process-wide high-water mark, in kilobytes on Linux
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    if instrumented or profile or memory:
+        report['instrumentation'] = instrument.report()
+        instrument.reset()
+    if memory:
+        phases = report['instrumentation']['phases'].values()
+        report['memory'] = {
+            'peak_memory': report['instrumentation']['peak_memory'],
+            'top_allocations': sorted(
+                (site for phase_times in phases for site in phase_times['top_allocations']),
+                key=lambda site: site['size'], reverse=True
+            )[:instrument.TOP_ALLOCATION_SITES],
+        }
+
+    return report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Run and time one part of a day.')
+    parser.add_argument('day', type=int, choices=DAYS)
+    parser.add_argument('part', type=int, choices=PARTS)
+    parser.add_argument('input', help='path to the puzzle input')
+    parser.add_argument('--repeat', type=int, default=1, help='number of timed runs (default 1)')
+    parser.add_argument('--instrument', action='store_true', help='report hot-path counters and phase timings')
+    parser.add_argument('--profile', action='store_true', help='also capture the run with cProfile')
+    parser.add_argument('--memory', action='store_true', help='trace peak memory and allocation sites per phase')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = time_part(
+        args.day, args.part, args.input, repeat=args.repeat, instrumented=args.instrument, profile=args.profile,
+        memory=args.memory
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
+
+
+def test_time_part():
+    from aoc.days import get_day_path
+
+    report = time_part(16, 1, get_day_path(16).parent / 'test.txt', repeat=2)
+
+    assert report['answer'] == 46
+    assert len(report['wall_time']['samples']) == 2
+    assert report['peak_rss_kb'] > 0
+    assert 'instrumentation' not in report
+
+
+def test_time_part_instrumented():
+    from aoc.days import get_day_path
+
+    report = time_part(16, 1, get_day_path(16).parent / 'test.txt', instrumented=True)
+
+    assert report['instrumentation']['counters']['beam.steps'] > 0
+    assert set(report['instrumentation']['phases']) == {'parse', 'solve', 'aggregate'}
+
+
+def test_time_part_memory():
+    from aoc.days import get_day_path
+
+    report = time_part(14, 1, get_day_path(14).parent / 'test.txt', memory=True)
+
+    assert report['memory']['peak_memory'] > 0
+    assert report['memory']['top_allocations']
+    assert 'peak_memory' in report['instrumentation']['phases']['parse']
+
+
+def test_time_part_disables_instrumentation_on_error(tmp_path):
+    import pytest
+    import tracemalloc
+
+    with pytest.raises(FileNotFoundError):
+        time_part(16, 1, tmp_path / 'missing.txt', memory=True)
+
+    assert not instrument.enabled
+    assert not tracemalloc.is_tracing()
+    instrument.reset()
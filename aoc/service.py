@@ -0,0 +1,371 @@
+"""
+Serve the solvers over a local Unix socket, with the day modules kept imported in a pool of worker processes.
+
+    python -m aoc.service --socket /tmp/aoc.sock --workers 4
+
+A client sends any number of requests over one connection. Each request is a JSON header line, followed by the
+input body of exactly 'length' bytes:
+
+    {"day": 16, "part": 2, "length": 11223}
+    <11223 bytes of puzzle input>
+
+and gets one JSON line back, with the answer (or an error) and the request's latency in seconds, split into receiving
+the body and solving it (including any wait for a free worker). The header {"metrics": true} instead returns latency
+summaries per day and part over the most recent requests.
+
+The body is streamed to a temporary file as it arrives, so a large input is never held in memory whole, and the
+solvers read it like any other input file. Solves run in a process pool, so CPU-heavy days (12, 16) neither block the
+event loop nor each other, and each worker imports every day once, when it starts. A solve still running after
+--timeout seconds is interrupted in its worker, which is then free for the next request, and answered with an error.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import stat
+import statistics
+import tempfile
+import time
+
+from collections import defaultdict, deque
+
+from aoc.days import DAYS, PARTS, get_part, load_day
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'aoc.sock')
+CHUNK_SIZE = 1 << 16
+DEFAULT_TIMEOUT = 60
+
+# the server waits this much longer than a solve's own time limit before giving up on its worker
+TIMEOUT_GRACE = 1
+
+# latency summaries cover this many of the most recent requests per day and part
+METRICS_WINDOW = 1000
+
+
+def _warm_worker(days):
+    for day in days:
+        load_day(day)
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError('solve timed out')
+
+
+def _solve_file(day, part, input_path, timeout=None):
+    """Solve in a worker. With a timeout, a SIGALRM interrupts the solve, so a stuck solve cannot keep the worker."""
+    if timeout:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return get_part(day, part)(input_path)
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _parse_header(header_line):
+    """The request header, checked to be a metrics request or to have int day, part and body length fields."""
+    header = json.loads(header_line)
+    if not isinstance(header, dict):
+        raise ValueError('expected a JSON object, got {!r}'.format(header))
+    if header.get('metrics'):
+        return header
+
+    for field in ('day', 'part', 'length'):
+        if not isinstance(header.get(field), int) or isinstance(header[field], bool):
+            raise ValueError('{!r} must be an integer'.format(field))
+    if header['length'] < 0:
+        raise ValueError("'length' must not be negative")
+    return header
+
+
+def _summarise(samples):
+    ordered = sorted(samples)
+    return {
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.mean(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+    }
+
+
+class LatencyMetrics:
+    """Request counts, and a window of recent latencies, per (day, part)."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, day, part, latency, error=False):
+        self.requests[day, part] += 1
+        if error:
+            self.errors[day, part] += 1
+        self.latencies[day, part].append(latency)
+
+    def report(self):
+        return {
+            '{}/{}'.format(day, part): {
+                'requests': self.requests[day, part],
+                'errors': self.errors[day, part],
+                **{
+                    stage: _summarise([latency[stage] for latency in latencies])
+                    for stage in ('receive', 'solve', 'total')
+                },
+            }
+            for (day, part), latencies in sorted(self.latencies.items())
+        }
+
+
+class SolverService:
+    """The connection handler and worker pool behind the socket."""
+
+    def __init__(self, workers=None, days=DAYS, timeout=DEFAULT_TIMEOUT):
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker, initargs=(days,))
+        self.timeout = timeout
+        self.metrics = LatencyMetrics()
+
+    async def _receive_body(self, reader, length):
+        """Stream length bytes from the connection to a temporary file, returning its path."""
+        loop = asyncio.get_running_loop()
+        with tempfile.NamedTemporaryFile('wb', suffix='.txt', delete=False) as f:
+            try:
+                remaining = length
+                while remaining:
+                    chunk = await reader.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ConnectionError('Connection closed {} bytes before the end of the body'.format(remaining))
+                    # written from a thread, so a slow disk does not stall the event loop
+                    await loop.run_in_executor(None, f.write, chunk)
+                    remaining -= len(chunk)
+            except BaseException:
+                os.remove(f.name)
+                raise
+            return f.name
+
+    async def _handle_request(self, header, reader):
+        day, part = header['day'], header['part']
+        response = {'day': day, 'part': part}
+
+        # the body is always read, even for a request that cannot be solved, so the next header lines up
+        start = time.perf_counter()
+        input_path = await self._receive_body(reader, header['length'])
+        received = time.perf_counter()
+        try:
+            if day not in DAYS or part not in PARTS:
+                raise ValueError('No solver for day {} part {}'.format(day, part))
+            solve = asyncio.get_running_loop().run_in_executor(
+                self.executor, _solve_file, day, part, input_path, self.timeout
+            )
+            # the wait includes any queueing for a worker; a request cancelled while still queued is never started
+            response['answer'] = await asyncio.wait_for(solve, self.timeout + TIMEOUT_GRACE if self.timeout else None)
+        except asyncio.TimeoutError:
+            response['error'] = 'TimeoutError: no answer within {} seconds'.format(self.timeout)
+        except Exception as e:
+            response['error'] = '{}: {}'.format(type(e).__name__, e)
+        finally:
+            os.remove(input_path)
+        solved = time.perf_counter()
+
+        response['latency'] = {'receive': received - start, 'solve': solved - received, 'total': solved - start}
+        self.metrics.record(day, part, response['latency'], error='error' in response)
+        return response
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                header_line = await reader.readline()
+                if not header_line:
+                    break
+
+                try:
+                    header = _parse_header(header_line)
+                except ValueError as e:
+                    # without a valid header there is no telling where the body ends, so the connection is dropped
+                    writer.write(json.dumps({'error': 'Bad request header: {}'.format(e)}).encode() + b'\n')
+                    break
+
+                if header.get('metrics'):
+                    response = {'metrics': self.metrics.report()}
+                else:
+                    response = await self._handle_request(header, reader)
+
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+
+async def start_service(socket_path=DEFAULT_SOCKET_PATH, workers=None, days=DAYS, timeout=DEFAULT_TIMEOUT):
+    """Start serving on the socket. Returns the asyncio server and the SolverService behind it."""
+    # a socket left behind by an earlier run is replaced, but any other file at the path is left alone
+    with contextlib.suppress(FileNotFoundError):
+        if stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            os.remove(socket_path)
+
+    service = SolverService(workers, days, timeout)
+    try:
+        server = await asyncio.start_unix_server(service.handle_connection, path=socket_path)
+    except BaseException:
+        service.close()
+        raise
+    return server, service
+
+
+async def request(socket_path, day, part, body):
+    """Solve one input (str or bytes) through a running service, returning its response."""
+    body = body.encode() if isinstance(body, str) else body
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        writer.write(json.dumps({'day': day, 'part': part, 'length': len(body)}).encode() + b'\n')
+        writer.write(body)
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+
+async def request_metrics(socket_path):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        writer.write(b'{"metrics": true}\n')
+        await writer.drain()
+        return json.loads(await reader.readline())['metrics']
+    finally:
+        writer.close()
+
+
+async def _serve(socket_path, workers, timeout):
+    server, service = await start_service(socket_path, workers, timeout=timeout)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the solvers over a local Unix socket.')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help='path of the Unix socket to listen on')
+    parser.add_argument('--workers', type=int, default=None, help='solver worker processes (default: CPU count)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='seconds allowed for each solve')
+    args = parser.parse_args(argv)
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_serve(args.socket, args.workers, args.timeout))
+
+
+if __name__ == '__main__':
+    main()
+
+
+def test_service_solves_streamed_inputs(tmp_path):
+    from aoc.days import get_day_path
+
+    socket_path = str(tmp_path / 'aoc.sock')
+    test_inputs = {day: (get_day_path(day).parent / 'test.txt').read_text() for day in (14, 16)}
+
+    async def run_requests():
+        server, service = await start_service(socket_path, workers=2, days=(14, 16))
+        try:
+            responses = await asyncio.gather(
+                request(socket_path, 16, 1, test_inputs[16]),
+                request(socket_path, 14, 2, test_inputs[14]),
+                request(socket_path, 16, 2, test_inputs[16].encode()),
+                request(socket_path, 99, 1, ''),
+            )
+            return responses, await request_metrics(socket_path)
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+
+    responses, metrics = asyncio.run(run_requests())
+
+    assert [response.get('answer') for response in responses] == [46, 64, 51, None]
+    assert responses[3]['error'].startswith('ValueError')
+    assert responses[0]['latency']['total'] >= responses[0]['latency']['solve']
+    assert metrics['16/1']['requests'] == 1 and metrics['99/1']['errors'] == 1
+
+
+def test_service_times_out_slow_solves(tmp_path):
+    from aoc.days import get_day_path
+    from aoc.generators import generate
+
+    socket_path = str(tmp_path / 'aoc.sock')
+    slow_input = generate(12, 24, seed=0)
+    test_input = (get_day_path(16).parent / 'test.txt').read_text()
+
+    async def run_requests():
+        server, service = await start_service(socket_path, workers=1, days=(12, 16), timeout=0.5)
+        try:
+            slow = await request(socket_path, 12, 1, slow_input)
+            # the only worker must be free again for this one to be answered
+            return slow, await request(socket_path, 16, 1, test_input)
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+
+    start = time.perf_counter()
+    slow, fast = asyncio.run(run_requests())
+
+    assert slow['error'].startswith('TimeoutError')
+    assert fast['answer'] == 46
+    assert time.perf_counter() - start < 10
+
+
+def test_service_rejects_bad_headers(tmp_path):
+    socket_path = str(tmp_path / 'aoc.sock')
+
+    async def send_header(header_line):
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        try:
+            writer.write(header_line + b'\n')
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            # the connection is dropped after a bad header
+            return response, await reader.read()
+        finally:
+            writer.close()
+
+    async def run_requests():
+        server, service = await start_service(socket_path, workers=1, days=())
+        try:
+            return [
+                await send_header(header_line)
+                for header_line in (
+                    b'[1]', b'not json', b'{"day": 16, "part": 1}', b'{"day": 16, "part": 1, "length": "3"}',
+                    b'{"day": 16, "part": true, "length": 3}', b'{"day": 16, "part": 1, "length": -1}',
+                )
+            ]
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+
+    for response, rest in asyncio.run(run_requests()):
+        assert response['error'].startswith('Bad request header') and rest == b''
+
+
+def test_start_service_only_replaces_sockets(tmp_path):
+    import pytest
+
+    not_a_socket = tmp_path / 'aoc.sock'
+    not_a_socket.write_text('keep me')
+
+    with pytest.raises(OSError):
+        asyncio.run(start_service(str(not_a_socket), workers=1, days=()))
+    assert not_a_socket.read_text() == 'keep me'
@@ -0,0 +1,92 @@
+"""
+Measure cold start per day: a fresh interpreter imports the day module, then solves a small generated input.
+
+    python -m aoc.startup --budget 0.05
+
+Each day's import time is held to an import-time budget (in seconds), and no day may pull in pytest. The exit status
+is 1 if any day breaks either rule.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+
+from pathlib import Path
+
+from aoc.days import DAYS, REPO_ROOT
+from aoc.generators import generate
+
+DEFAULT_IMPORT_BUDGET = 0.05
+STARTUP_INPUT_SIZE = 10
+
+_MEASURE_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from aoc.days import load_day
+module = load_day({day})
+imported = time.perf_counter()
+module.part_1({input_path!r})
+solved = time.perf_counter()
+print(json.dumps({{
+    'import_time': imported - start,
+    'solve_time': solved - imported,
+    'pytest_imported': 'pytest' in sys.modules,
+}}))
+'''
+
+
+def measure_startup(day, input_path):
+    """Cold import and part 1 solve times for a day, from a fresh interpreter."""
+    script = _MEASURE_SCRIPT.format(day=day, input_path=str(input_path))
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def check_startup(days=DAYS, budget=DEFAULT_IMPORT_BUDGET):
+    """Returns the measurements for each day, and a list of the days' problems."""
+    measurements = {}
+    problems = []
+
+    with tempfile.TemporaryDirectory() as input_dir:
+        for day in days:
+            input_path = Path(input_dir) / '{}.txt'.format(day)
+            input_path.write_text(generate(day, STARTUP_INPUT_SIZE))
+            measurements[day] = measure_startup(day, input_path)
+
+            if measurements[day]['pytest_imported']:
+                problems.append('day {} imports pytest'.format(day))
+            if measurements[day]['import_time'] > budget:
+                problems.append('day {} import took {:.4f}s, over the {}s budget'.format(
+                    day, measurements[day]['import_time'], budget
+                ))
+
+    return measurements, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check cold import and solve time per day.')
+    parser.add_argument('--days', type=int, nargs='+', choices=DAYS, default=DAYS)
+    parser.add_argument('--budget', type=float, default=DEFAULT_IMPORT_BUDGET, help='import time budget in seconds')
+    args = parser.parse_args(argv)
+
+    measurements, problems = check_startup(args.days, args.budget)
+    print(json.dumps(measurements, indent=2))
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
+
+
+def test_no_day_imports_pytest():
+    measurements, problems = check_startup(budget=float('inf'))
+
+    assert set(measurements) == set(DAYS)
+    assert problems == []
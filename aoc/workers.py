@@ -0,0 +1,21 @@
+"""
+Process pool workers for the days' parallel modes.
+
+Pools pickle their initializer and task functions by name, and a worker started with spawn or forkserver (rather than
+fork) has to import that name afresh. Day modules are loaded from file paths, not imported by name, so their workers
+live here and reach the day through load_day.
+"""
+
+from aoc.days import load_day
+
+_beam_grid = None
+
+
+def init_beam_grid(rows):
+    """Build this worker's own copy of a day 16 grid."""
+    global _beam_grid
+    _beam_grid = load_day(16).Grid(rows)
+
+
+def count_energised_tiles_for_starts(starts):
+    return _beam_grid.get_energised_tiles_by_start(starts)